@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Time builds of synthetic layouts and compare them against an earlier run.
+import logging
+
+from time import time
+
+from .jobs import build_layout
+from .synthetic import synthetic_layout
+
+log = logging.getLogger()
+
+
+def run_benchmark(kinds, key_counts, layers=('switch',), formats=('dxf',), backend='cadquery', directory='static/exports', repeat=1):
+    """Build a synthetic layout for every kind and key count.
+
+    Each build is done `repeat` times and the fastest time for each stage is
+    kept, to cut down on noise.
+
+    Returns a dictionary with the settings that were used and a list of runs.
+    """
+    runs = []
+    for kind in kinds:
+        for keys in key_counts:
+            run = {'kind': kind, 'keys': keys, 'total': None, 'stages': {}}
+
+            for i in range(repeat):
+                layout = synthetic_layout(kind, keys)
+                layout[0]['name'] = 'bench_%s_%d' % (kind, keys)
+                layout[0]['backend'] = backend
+                layout[0]['layers'] = dict((layer, {}) for layer in layers)
+
+                build_start = time()
+                result = build_layout(layout, list(formats), directory)
+                total = time() - build_start
+
+                run['total'] = total if run['total'] is None else min(run['total'], total)
+                for stage, stats in result['timings'].items():
+                    run['stages'][stage] = min(run['stages'].get(stage, stats['seconds']), stats['seconds'])
+
+            log.info('Built %s with %d keys in %.3f seconds', kind, keys, run['total'])
+            runs.append(run)
+
+    return {
+        'backend': backend,
+        'layers': list(layers),
+        'formats': list(formats),
+        'runs': runs
+    }
+
+
+def compare_results(results, baseline, threshold=0.2, min_seconds=0.01):
+    """Compare a benchmark against a baseline.
+
+    threshold: How much slower, as a fraction, a stage can get before it counts as a regression
+
+    min_seconds: Ignore stages that got slower by less than this many seconds
+
+    Returns a list of messages, one for each regression.
+    """
+    baseline_runs = dict(((run['kind'], run['keys']), run) for run in baseline['runs'])
+    regressions = []
+
+    for run in results['runs']:
+        old_run = baseline_runs.get((run['kind'], run['keys']))
+        if not old_run:
+            continue
+
+        times = [('total', run['total'], old_run['total'])]
+        for stage in sorted(run['stages']):
+            if stage in old_run['stages']:
+                times.append((stage, run['stages'][stage], old_run['stages'][stage]))
+
+        for stage, seconds, old_seconds in times:
+            if seconds - old_seconds > min_seconds and seconds > old_seconds * (1 + threshold):
+                regressions.append('%s with %d keys: %s went from %.3f to %.3f seconds (+%d%%)' % (
+                    run['kind'], run['keys'], stage, old_seconds, seconds, round((seconds / old_seconds - 1) * 100) if old_seconds else 100
+                ))
+
+    return regressions
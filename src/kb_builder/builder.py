@@ -30,20 +30,28 @@ import hashlib
 import hjson
 import logging
 import math
+import multiprocessing
+import os
 import sys
+import tempfile
 
+from collections import namedtuple
 from os import makedirs
 from os.path import exists
+from time import time
+
+from .exporters import write_dxf, write_outline, write_svg
+from .plate2d import Plate2D, shape_contours, union_polygons
+from .spatial import bounds_overlap, cluster_bounds, points_bounds
+from .timing import Timer, timed
 
 log = logging.getLogger()
 
-sys.path.append('/usr/lib/freecad/lib')  # Setup the import environment for FreeCAD
-import FreeCAD
-import cadquery
-import importDXF
-import importSVG
-import Mesh
-import Part
+# FreeCAD is slow to load, so it's only imported once a cadquery plate is
+# drawn. See load_cadquery().
+FreeCAD = None
+Part = None
+cadquery = None
 
 # Custom log levels
 CUT_SWITCH = 9
@@ -66,10 +74,166 @@ STABILIZERS = {
     10: (66.675, 0)
 }
 
+BACKENDS = ('cadquery', '2d')
+KeyPlacement = namedtuple('KeyPlacement', ['x', 'y', 'rotation', 'key'])
+KeyCutout = namedtuple('KeyCutout', ['x', 'y', 'template_key'])
+CUT_MODES = ('key', 'batch', 'cluster')
+CONTOUR_FORMATS = ('dxf', 'svg', 'outline')  # Exported from the outlines, in this order
+SOLID_FORMATS = ('js', 'brp', 'stp', 'stl')  # Exported from the solid, in this order
+TESSELLATED_FORMATS = ('js', 'outline', 'stl')
+LAZY_FORMATS = ('dxf', 'svg', 'outline', 'js', 'stp', 'stl')  # Can be written from a layer's BREP later
+TESSELLATION_PRESETS = {  # (linear deflection in mm, angular deflection in radians)
+    'coarse': (0.5, 0.5),
+    'fine': (0.01, 0.1)
+}
+
 logging.addLevelName(CUT_SWITCH, 'cut_switch')
 logging.addLevelName(CENTER_MOVE, 'center_move')
 
 
+def load_cadquery():
+    """Import FreeCAD, Part and cadquery, if they haven't been already.
+
+    Parsing layouts and the 2d backend don't need them.
+    """
+    global FreeCAD, Part, cadquery
+    if cadquery is None:
+        sys.path.append('/usr/lib/freecad/lib')  # Setup the import environment for FreeCAD
+        import FreeCAD
+        import Part
+        import cadquery
+
+    return cadquery
+
+
+def can_fork_pool():
+    """Returns True when this process is allowed to start a multiprocessing.Pool.
+
+    Pool workers are daemon processes, and those can't start processes of
+    their own, so anything that runs in a worker has to do its work itself.
+    """
+    return not multiprocessing.current_process().daemon
+
+
+def rotation_matrix(degrees):
+    """Returns the 2x2 matrix for a counterclockwise rotation of degrees.
+
+    Multiples of 90 degrees use exact values so the cutouts stay square.
+    """
+    quarters, remainder = divmod(degrees, 90)
+    if remainder == 0:
+        cos, sin = ((1, 0), (0, 1), (-1, 0), (0, -1))[int(quarters) % 4]
+    else:
+        cos = math.cos(math.radians(degrees))
+        sin = math.sin(math.radians(degrees))
+
+    return ((cos, -sin), (sin, cos))
+
+
+def write_contour_format(contours, export_format, filename, thickness, tessellation=None):
+    """Write contours to one of CONTOUR_FORMATS.
+
+    thickness and tessellation are only used by the outline format.
+    """
+    if export_format == 'dxf':
+        write_dxf(contours, filename)
+    elif export_format == 'svg':
+        write_svg(contours, filename)
+    elif export_format == 'outline':
+        write_outline(contours, filename, thickness, tessellation)
+
+
+def write_solid_format(shape, export_format, basename, tessellation=None):
+    """Export a FreeCAD shape to one of SOLID_FORMATS.
+
+    tessellation: The (linear, angular) deflection to mesh js and stl files
+    with. The TJS exporter only takes the linear deflection.
+
+    Returns a Timer with the time it took as the `export_<format>` stage.
+    """
+    load_cadquery()
+    timer = Timer()
+    filename = '%s.%s' % (basename, export_format)
+    with timer.stage('export_'+export_format):
+        if export_format == 'js':
+            with open(filename, 'w') as f:
+                cadquery.exporters.exportShape(cadquery.Shape.cast(shape), 'TJS', f, tessellation[0])
+        elif export_format == 'brp':
+            shape.exportBrep(filename)
+        elif export_format == 'stp':
+            shape.exportStep(filename)
+        elif export_format == 'stl':
+            import MeshPart
+            linear, angular = tessellation
+            MeshPart.meshFromShape(Shape=shape, LinearDeflection=linear, AngularDeflection=angular, Relative=False).write(filename)
+
+    return timer
+
+
+def write_solid_format_job(args):
+    """Worker side of write_solid_format(). The shape is sent as a BREP string.
+
+    Pool.map() only passes a single argument, so args is a tuple of
+    (brep, export_format, basename, tessellation).
+    """
+    brep, export_format, basename, tessellation = args
+    load_cadquery()
+    shape = Part.Shape()
+    shape.importBrepFromString(brep)
+
+    return write_solid_format(shape, export_format, basename, tessellation)
+
+
+def export_brep(basename, export_format, tessellation=None):
+    """Write `<basename>.<export_format>` from the `<basename>.brp` a build left behind.
+
+    This is how a layer's lazy_formats are written once someone asks for them.
+    The file is written under a temporary name in the same directory and
+    renamed into place, so nobody can pick it up half written.
+
+    Returns a Timer for the export.
+    """
+    load_cadquery()
+    timer = Timer()
+    with timer.stage('export_load'):
+        shape = Part.read(basename + '.brp')
+
+    # Keep the extension, the mesh writers go by it
+    directory, name = os.path.split(basename)
+    handle, filename = tempfile.mkstemp('.'+export_format, name + '.', directory or '.')
+    os.close(handle)
+    try:
+        if export_format in CONTOUR_FORMATS:
+            with timer.stage('export_contours'):
+                contours = shape_contours(shape)
+            with timer.stage('export_'+export_format):
+                write_contour_format(contours, export_format, filename, shape.BoundBox.ZLength, tessellation)
+        else:
+            timer.merge(write_solid_format(shape, export_format, filename[:-len(export_format)-1], tessellation))
+        os.rename(filename, '%s.%s' % (basename, export_format))
+    except:
+        os.remove(filename)
+        raise
+
+    log.info("Exported '%s' to %s.%s", export_format.upper(), basename, export_format)
+
+    return timer
+
+
+def cut_tile(args):
+    """Worker side of KeyboardCase.cut_tiles().
+
+    Pool.map() only passes a single argument, so args is a tuple of
+    (layout, layer, band, keys).
+
+    Returns the result of cut_band() and the Timer for the worker's case.
+    """
+    layout, layer, band, keys = args
+    case = KeyboardCase(layout)
+
+    return case.cut_band(layer, band, keys), case.timer
+
+
 def load_layout(layout_text):
     """Loads a KLE layout file and returns a list of rows.
     """
@@ -98,11 +262,14 @@ class KeyboardCase(object):
     def __init__(self, keyboard_layout, formats=None):
         # User settable things
         self.name = None
+        self.backend = 'cadquery'
         self.case = {'type': None}
         self.case_type = None
         self.corner_type = None
         self.corners = 0
+        self.cut_mode = 'key'
         self.formats = formats if formats else ['dxf']
+        self.lazy_formats = []
         self.feet = None
         self.foot_hole_diameter = 3
         self.foot_hole_square = 9
@@ -113,6 +280,12 @@ class KeyboardCase(object):
         self.layer_screw = self.screw.copy()
         self.stab_type = 'cherry'
         self.switch_type = 'mx'
+        self.tessellation = {
+            'js': TESSELLATION_PRESETS['coarse'],
+            'outline': TESSELLATION_PRESETS['coarse'],
+            'stl': TESSELLATION_PRESETS['fine']
+        }
+        self.tiles = 1
         self.key_spacing = 19.05
         self.usb = {
             'inner_width': 10,
@@ -127,8 +300,14 @@ class KeyboardCase(object):
 
         # Plate state info
         self.plate = None
+        self.timer = Timer()
+        self.timings = self.timer.stages
+        self.base_plates = {}
+        self.cutout_templates = {}
+        self.merged_templates = {}
         self.UOM = "mm"
         self.exports = {}
+        self.export_workers = None  # See export_pool()
         self.grow_y = 0
         self.grow_x = 0
         self.height = 0
@@ -137,14 +316,39 @@ class KeyboardCase(object):
         self.layers = {'switch': {}}
         self.layout = []
         self.origin = (0,0)
+        self.placements = []
+        self.switch_layers = {}
         self.width = 0
-        self.x_off = 0
         self.x_holes = 0
         self.y_holes = 0
 
         # Determine the size of each key
         self.parse_layout()
 
+    def create_layer(self, layer, previous=None):
+        """Returns any layer, picking how to draw it based on its name.
+
+        previous: A KeyboardCase for an earlier version of this layout, or
+        anything else with its `switch_layers`. When given, switch based
+        layers only recut the keys that changed.
+
+        Returns None if we don't know how to draw the layer.
+        """
+        log.debug("create_layer(layer='%s')" % layer)
+        if layer == 'simple':
+            return self.init_plate(layer)
+        elif layer == 'bottom':
+            return self.create_bottom_layer(layer)
+        elif layer in ('closed', 'open', 'middle'):
+            return self.create_middle_layer(layer)
+        elif layer in ('reinforcing', 'switch', 'top'):
+            if previous:
+                return self.update_switch_layer(layer, previous)
+            return self.create_switch_layer(layer)
+
+        log.error('Unknown layer %s, not drawing it!', layer)
+
+    @timed('bottom_layer')
     def create_bottom_layer(self, layer='bottom'):
         """Returns a copy of the bottom layer ready to export.
         """
@@ -154,8 +358,9 @@ class KeyboardCase(object):
         if self.feet:
             self.cut_feet_holes()
 
-        return self.plate.cutThruAll()
+        return self.cut_thru_all()
 
+    @timed('middle_layer')
     def create_middle_layer(self, layer='closed'):
         """Returns a copy of the middle layer ready to export.
 
@@ -178,59 +383,320 @@ class KeyboardCase(object):
         if self.feet:
             self.draw_feet()
 
-        self.plate = self.plate.cutThruAll()
+        self.plate = self.cut_thru_all()
 
         return self.plate
 
+    @timed('switch_layer')
     def create_switch_layer(self, layer):
         """Returns a copy of one of the switch based layers ready to export.
 
         The switch based layers are `switch`, `reinforcing`, and `top`.
+
+        When `cut_mode` is `batch` the cutouts are only drawn at each key's
+        placement, and the final `cutThruAll()` removes all of them in a single
+        compound cut. The cutouts of each key are merged first, see
+        merged_template(), so none of the wires overlap. When it's `cluster` see cut_clusters().
+
+        When `tiles` is more than 1 the keys are split into bands that are
+        cut at the same time, see cut_tiles().
+
+        What was cut for each key is kept in `self.switch_layers` so a later
+        build can use update_switch_layer().
         """
         log.debug("create_switch_layer(layer='%s')" % layer)
-        prev_width = None
-        prev_y_off = 0
-
         self.init_plate(layer)
-        self.center(-self.width/2, -self.height/2) # move to top left of the plate
+        base = self.plate.copy() if self.backend == '2d' else self.plate.val()
+        cutouts = [(self.key_cutout(placement, layer), placement) for placement in self.placements]
 
-        for r, row in enumerate(self.layout):
-            for k, key in enumerate(row):
-                x, y, kx = 0, 0, 0
-                if 'x' in key:
-                    x = key['x'] * self.key_spacing
-                    kx = x
+        bands = self.tile_bands(cutouts) if self.tiles > 1 else []
+        if len(bands) > 1:
+            self.cut_tiles(layer, bands)
+        else:
+            self.cut_keys(cutouts, layer)
+        self.record_switch_layer(layer, base, [])
 
-                if 'y' in key and k == 0:
-                    y = key['y'] * self.key_spacing
-
-                if r == 0 and k == 0: # handle placement of the first key in first row
-                    self.center((key['w'] * self.key_spacing / 2), (self.key_spacing / 2))
-                    x += (self.x_pad+self.x_pcb_pad)
-                    y += (self.y_pad+self.y_pcb_pad)
-                    # set x_off negative since the 'cut_switch' will append 'x' and we need to account for initial spacing
-                    self.x_off = -(x - (self.key_spacing/2 + key['w']*self.key_spacing/2) - kx)
-                elif k == 0: # handle changing rows
-                    self.center(-self.x_off, self.key_spacing) # move to the next row
-                    self.x_off = 0 # reset back to the left side of the plate
-                    x += self.key_spacing/2 + key['w']*self.key_spacing/2
-                else: # handle all other keys
-                    x += prev_width*self.key_spacing/2 + key['w']*self.key_spacing/2
-
-                if prev_y_off != 0: # prev_y_off != 0
-                    y += -prev_y_off
-                    prev_y_off = 0
-
-                if 'h' in key and key['h'] > 1: # deal with vertical keys
-                    prev_y_off = key['h']*self.key_spacing/2 - self.key_spacing/2
-                    y += prev_y_off
-
-                # Cut the switch hole
-                self.cut_switch((x, y), key, layer)
-                prev_width = key['w']
+        return self.plate
+
+    @timed('switch_layer')
+    def update_switch_layer(self, layer, previous):
+        """Returns a switch based layer, only recutting the keys that changed since `previous` built it.
+
+        previous: A KeyboardCase for an earlier version of this layout, or
+        anything else with its `switch_layers`
+
+        Keys that moved, changed or went away are filled back in from the
+        previous plate as it was before any keys were cut, then only the new
+        cutouts are cut. If anything else about the layer changed, or most of
+        the keys did, the layer is built from scratch instead.
+        """
+        log.debug("update_switch_layer(layer='%s')" % layer)
+        record = previous.switch_layers.get(layer)
+        if not record or record['signature'] != self.plate_signature(layer):
+            log.info('The %s layer has changed, building it from scratch.', layer)
+            return self.create_switch_layer(layer)
+
+        # Match every key to an identical cutout from the previous build
+        unmatched = {}
+        for cutout, holes in record['cutouts']:
+            unmatched.setdefault(cutout, []).append(holes)
+        kept = []
+        added = []
+        for placement in self.placements:
+            cutout = self.key_cutout(placement, layer)
+            if unmatched.get(cutout):
+                kept.append((cutout, unmatched[cutout].pop(0)))
+            else:
+                added.append((cutout, placement))
+        removed = [cutout for cutout, holes_list in unmatched.items() for holes in holes_list]
+
+        if (len(added) + len(removed)) * 2 > len(self.placements):
+            log.info('Most of the keys on the %s layer have changed, building it from scratch.', layer)
+            return self.create_switch_layer(layer)
+
+        log.info('Recutting %d of %d keys on the %s layer.', len(added), len(self.placements), layer)
+        base = record['base']
+        cutouts = []
+        if self.backend == '2d':
+            # Keep the base holes and the holes of every key that didn't change
+            self.plate = base.copy()
+            for cutout, (start, end) in kept:
+                cutouts.append((cutout, (len(self.plate.holes), len(self.plate.holes) + end - start)))
+                self.plate.holes.extend(record['plate'].holes[start:end])
+        else:
+            plate = record['plate']
+            if removed:
+                with self.timer.stage('restore'):
+                    for cutout in removed:
+                        for polylines in self.get_cutout_template(cutout.template_key):
+                            plate = plate.fuse(base.intersect(self.cutout_solid(cutout, polylines, layer)))
+                    plate = cadquery.Shape.cast(plate.wrapped.removeSplitter())
+
+                    # Recut the neighbours that overlap what was filled in
+                    removed_bounds = [self.cutout_bounds(cutout) for cutout in removed]
+                    for cutout, holes in kept:
+                        if any(bounds_overlap(self.cutout_bounds(cutout), bounds) for bounds in removed_bounds):
+                            for polylines in self.get_cutout_template(cutout.template_key):
+                                plate = plate.cut(self.cutout_solid(cutout, polylines, layer))
+            self.plate = self.workplane(plate, self.layers[layer].get('thickness', 1.5))
+            cutouts = kept
+
+        self.origin = (0,0)
+        self.cut_keys(added, layer)
+        self.record_switch_layer(layer, base, cutouts)
+
+        return self.plate
+
+    def cut_keys(self, cutouts, layer):
+        """Cut a list of (KeyCutout, KeyPlacement) out of the plate.
+
+        The holes each key added to a 2d plate are collected in `self.key_holes`.
+        """
+        if self.cut_mode == 'cluster' and self.backend == 'cadquery':
+            self.key_holes = [(cutout, (None, None)) for cutout, placement in cutouts]
+            return self.cut_clusters([cutout for cutout, placement in cutouts], layer)
+
+        self.key_holes = []
+        for cutout, placement in cutouts:
+            start = self.hole_count()
+            self.cut_switch((placement.x, placement.y), placement.key, layer)
+            self.key_holes.append((cutout, (start, self.hole_count())))
 
         self.recenter()
-        return self.plate.cutThruAll()
+        self.plate = self.cut_thru_all()
+
+        return self.plate
+
+    def tile_bands(self, cutouts):
+        """Split a list of (KeyCutout, KeyPlacement) into `self.tiles` vertical bands.
+
+        Each band gets about the same number of keys. Bands are only split
+        where no cutout crosses, so each one can be cut on its own. The outer
+        bands reach past the edges of the plate.
+
+        Returns a list of ((min_x, max_x), key numbers).
+        """
+        bounds = [self.cutout_bounds(cutout) for cutout, placement in cutouts]
+        keys = sorted(range(len(cutouts)), key=lambda i: bounds[i][0])
+        band_size = int(math.ceil(len(keys) / float(self.tiles)))
+        extent = self.width + self.height
+
+        bands = []
+        band_keys = []
+        band_start = -extent
+        right_edge = -extent
+        for i, key in enumerate(keys):
+            band_keys.append(key)
+            right_edge = max(right_edge, bounds[key][2])
+            if len(band_keys) >= band_size and i + 1 < len(keys) and right_edge < bounds[keys[i + 1]][0]:
+                band_end = (right_edge + bounds[keys[i + 1]][0]) / 2.0
+                bands.append(((band_start, band_end), band_keys))
+                band_start = band_end
+                band_keys = []
+
+        if band_keys:
+            bands.append(((band_start, extent), band_keys))
+
+        return bands
+
+    @timed('tiles')
+    def cut_tiles(self, layer, bands):
+        """Cut the keys of a switch based layer one band at a time, using a process for each band.
+
+        bands: The result of tile_bands()
+
+        With the 2d backend the holes from every band are put together. With
+        cadquery each band is cut from a slice of the plate, and the slices
+        are fused back together.
+        """
+        jobs = [(self.keyboard_layout, layer, band, keys) for band, keys in bands]
+        if len(jobs) == 1 or not can_fork_pool():
+            results = [cut_tile(job) for job in jobs]
+        else:
+            pool = multiprocessing.Pool(len(jobs))
+            try:
+                results = pool.map(cut_tile, jobs)
+            finally:
+                pool.close()
+                pool.join()
+
+        self.key_holes = []
+        slices = []
+        for (band, keys), (tile, timer) in zip(bands, results):
+            self.timer.merge(timer)
+            if self.backend == '2d':
+                for key, holes in zip(keys, tile):
+                    cutout = self.key_cutout(self.placements[key], layer)
+                    self.key_holes.append((cutout, (len(self.plate.holes), len(self.plate.holes) + len(holes))))
+                    self.plate.holes.extend(holes)
+            else:
+                self.key_holes.extend((self.key_cutout(self.placements[key], layer), (None, None)) for key in keys)
+                shape = Part.Shape()
+                shape.importBrepFromString(tile)
+                slices.append(cadquery.Shape.cast(shape))
+
+        if slices:
+            plate = slices[0]
+            for tile in slices[1:]:
+                plate = plate.fuse(tile)
+            plate = cadquery.Shape.cast(plate.wrapped.removeSplitter())
+            self.plate = self.workplane(plate, self.layers[layer].get('thickness', 1.5))
+
+        return self.plate
+
+    def cut_band(self, layer, band, keys):
+        """Cut one band of a switch based layer for cut_tiles().
+
+        band: The (min_x, max_x) of the band
+
+        keys: The numbers of the keys in the band
+
+        Returns a list with the holes of each key for the 2d backend, or the
+        band's slice of the plate as a BREP string for cadquery.
+        """
+        log.debug("cut_band(layer='%s', band='%s')", layer, band)
+        self.init_plate(layer)
+        if self.backend == '2d':
+            self.cut_keys([(self.key_cutout(self.placements[key], layer), self.placements[key]) for key in keys], layer)
+            return [self.plate.holes[start:end] for cutout, (start, end) in self.key_holes]
+
+        thickness = self.layers[layer].get('thickness', 1.5)
+        extent = self.width + self.height
+        box = cadquery.Solid.makeBox(band[1] - band[0], extent * 2, thickness * 2, cadquery.Vector(band[0], -extent, -thickness))
+        self.plate = self.workplane(self.plate.val().intersect(box), thickness)
+        self.cut_keys([(self.key_cutout(self.placements[key], layer), self.placements[key]) for key in keys], layer)
+
+        return self.plate.val().wrapped.exportBrepToString()
+
+    def record_switch_layer(self, layer, base, cutouts):
+        """Remember what went into a switch based layer for update_switch_layer().
+
+        base: The plate before any keys were cut
+
+        cutouts: (KeyCutout, holes) for keys that were kept from a previous build
+        """
+        self.switch_layers[layer] = {
+            'signature': self.plate_signature(layer),
+            'base': base,
+            'plate': self.plate if self.backend == '2d' else self.plate.val(),
+            'cutouts': cutouts + self.key_holes
+        }
+
+    def plate_signature(self, layer):
+        """Returns a string describing everything about a switch based layer except the keys.
+
+        Case wide settings that change the cutouts of every key, like grow_x,
+        belong here too, since cutout_template_key() doesn't include them.
+        """
+        return hjson.dumps([
+            self.backend, self.width, self.height, self.inside_width, self.inside_height, self.kerf,
+            self.corners, self.corner_type, self.case_type, self.screw, self.usb, self.layers[layer],
+            self.grow_x, self.grow_y, self.key_spacing
+        ], sort_keys=True)
+
+    def key_cutout(self, placement, layer):
+        """Returns a KeyCutout describing what gets cut for a placed key.
+        """
+        return KeyCutout(placement.x, placement.y, self.cutout_template_key(placement.key, layer))
+
+    def hole_count(self):
+        """Returns how many holes a 2d plate has, including the ones waiting to be cut.
+        """
+        if self.backend == '2d':
+            return len(self.plate.holes) + len(self.plate.pending)
+
+    def cutout_bounds(self, cutout):
+        """Returns the (min_x, min_y, max_x, max_y) of a key's cutouts, relative to the center of the plate.
+        """
+        points = [point for polylines in self.get_cutout_template(cutout.template_key) for points in polylines for point in points]
+
+        return points_bounds(points, cutout.x, cutout.y)
+
+    def cutout_clusters(self, cutouts):
+        """Group the cuts for a list of KeyCutout into clusters that don't touch each other.
+
+        A switch and its stabilizer overlap, but different keys usually don't,
+        so most clusters are a single key.
+
+        Returns a list of clusters, each a list of (KeyCutout, polylines).
+        """
+        cuts = [(cutout, polylines) for cutout in cutouts for polylines in self.get_cutout_template(cutout.template_key)]
+        bounds = [points_bounds([point for points in polylines for point in points], cutout.x, cutout.y) for cutout, polylines in cuts]
+
+        return [[cuts[i] for i in cluster] for cluster in cluster_bounds(bounds, self.key_spacing)]
+
+    @timed('cut_clusters')
+    def cut_clusters(self, cutouts, layer):
+        """Cut a list of KeyCutout out of the plate one cluster at a time.
+
+        The cuts in each cluster are fused into a single tool, so every fuse
+        only involves the shapes around one key. The tools don't touch each
+        other, so they go into one compound that is cut from the plate once.
+        """
+        tools = []
+        for cluster in self.cutout_clusters(cutouts):
+            tool = None
+            for cutout, polylines in cluster:
+                solid = self.cutout_solid(cutout, polylines, layer)
+                tool = solid if tool is None else tool.fuse(solid)
+            tools.append(tool)
+
+        if tools:
+            with self.timer.stage('cut'):
+                plate = self.plate.val().cut(cadquery.Compound.makeCompound(tools))
+            self.plate = self.workplane(plate, self.layers[layer].get('thickness', 1.5))
+
+        return self.plate
+
+    def cutout_solid(self, cutout, polylines, layer):
+        """Returns a solid for one cut of a key's cutout template that reaches through the whole layer.
+        """
+        thickness = self.layers[layer].get('thickness', 1.5)
+        tool = cadquery.Workplane(cadquery.Plane((0, 0, -thickness), (1, 0, 0), (0, 0, -1)))
+        for points in polylines:
+            tool = tool.polyline([(x + cutout.x, y + cutout.y) for x, y in points])
+
+        return tool.extrude(-thickness*2, False).val()
 
     def draw_feet(self):
         """Draw the feet on a layer.
@@ -304,7 +770,7 @@ class KeyboardCase(object):
         self.plate = self.plate.center(left_hole, bottom_foot_y).circle((hole_radius)-self.kerf).center(-left_hole, -bottom_foot_y)
         self.plate = self.plate.center(right_hole, bottom_foot_y).circle((hole_radius)-self.kerf).center(-right_hole, -bottom_foot_y)
 
-        return self.plate.cutThruAll()
+        return self.cut_thru_all()
 
     def cut_usb_hole(self, layer):
         """Cut the opening that allows for the USB hole.
@@ -353,7 +819,7 @@ class KeyboardCase(object):
             ]
             self.plate = self.plate.polyline(points)
 
-        self.plate = self.plate.cutThruAll()
+        self.plate = self.cut_thru_all()
         return self.plate
 
     def cut_plate_polygons(self, layer):
@@ -365,7 +831,7 @@ class KeyboardCase(object):
         for polygon in self.layers[layer]['polygons']:
             self.plate = self.plate.polyline(polygon)
 
-        self.plate = self.plate.cutThruAll()
+        self.plate = self.cut_thru_all()
         #self.center(self.width/2 - self.kerf, self.height/2 - self.kerf) # move to center of the plate
 
     def cut_plate_holes(self, layer):
@@ -381,8 +847,9 @@ class KeyboardCase(object):
 
         self.center(self.width/2 - self.kerf, self.height/2 - self.kerf) # move to center of the plate
 
-        return self.plate.cutThruAll()
+        return self.cut_thru_all()
 
+    @timed('parse_layout')
     def parse_layout(self):
         """Parse the supplied layout to determine size and populate the properties of each key.
         """
@@ -396,6 +863,12 @@ class KeyboardCase(object):
                 if 'name' in row:
                     self.name = row['name']
 
+                if 'backend' in row:
+                    if row['backend'] in BACKENDS:
+                        self.backend = row['backend']
+                    else:
+                        log.error('Unknown backend %s, defaulting to %s!', row['backend'], self.backend)
+
                 if 'case_type' in row:
                     self.case_type = row['case_type']
                     if self.case_type == 'poker' and not ('screw' in row and 'radius' in row['screw'] and row['screw']['radius'] > 0):
@@ -421,6 +894,28 @@ class KeyboardCase(object):
                 if 'corner_radius' in row:
                     self.corners = float(row['corner_radius'])
 
+                if 'cut_mode' in row:
+                    if row['cut_mode'] in CUT_MODES:
+                        self.cut_mode = row['cut_mode']
+                    else:
+                        log.error('Unknown cut_mode %s, defaulting to %s!', row['cut_mode'], self.cut_mode)
+
+                if 'lazy_formats' in row:
+                    for export_format in row['lazy_formats']:
+                        if export_format in LAZY_FORMATS:
+                            self.lazy_formats.append(export_format)
+                        else:
+                            log.error('Unknown lazy format %s, use one of: %s', export_format, ', '.join(LAZY_FORMATS))
+
+                if 'tessellation' in row:
+                    self.parse_tessellation(row['tessellation'])
+
+                if 'tiles' in row:
+                    if isinstance(row['tiles'], int) and row['tiles'] >= 1:
+                        self.tiles = row['tiles']
+                    else:
+                        log.error('Invalid tiles %s, defaulting to %s!', row['tiles'], self.tiles)
+
                 if 'feet' in row:
                     self.feet = row['feet']
 
@@ -526,18 +1021,90 @@ class KeyboardCase(object):
         self.horizontal_edge = self.width / 2
         self.vertical_edge = self.height / 2
 
+        # Now that we know the size we can place the keys
+        self.place_keys()
+
+    def parse_tessellation(self, tessellation):
+        """Set how finely each of TESSELLATED_FORMATS is meshed.
+
+        tessellation is the name of a preset for every format, or a dictionary
+        of format to either a preset name or a dictionary with the
+        `linear_deflection` and/or `angular_deflection` to use.
+        """
+        if not isinstance(tessellation, dict):
+            tessellation = dict((export_format, tessellation) for export_format in TESSELLATED_FORMATS)
+
+        for export_format, setting in tessellation.items():
+            if export_format not in TESSELLATED_FORMATS:
+                log.error('Unknown tessellation format %s, use one of: %s', export_format, ', '.join(TESSELLATED_FORMATS))
+                continue
+
+            linear, angular = self.tessellation[export_format]
+            if isinstance(setting, dict):
+                linear = setting.get('linear_deflection', linear)
+                angular = setting.get('angular_deflection', angular)
+                if isinstance(linear, (int, float)) and isinstance(angular, (int, float)) and linear > 0 and angular > 0:
+                    self.tessellation[export_format] = (float(linear), float(angular))
+                else:
+                    log.error('Invalid tessellation %s for %s, defaulting to %s!', setting, export_format, self.tessellation[export_format])
+            elif setting in tuple(TESSELLATION_PRESETS):
+                self.tessellation[export_format] = TESSELLATION_PRESETS[setting]
+            else:
+                log.error('Unknown tessellation %s for %s, defaulting to %s!', setting, export_format, self.tessellation[export_format])
+
+    @timed('place_keys')
+    def place_keys(self):
+        """Determine the position of every key in a single pass over the layout.
+
+        Each key is recorded as a KeyPlacement in `self.placements`, with x
+        and y measured from the center of the plate and rotation being the
+        angle the switch cutout is turned by. The cutout itself depends on
+        the layer, so it is looked up with `cutout_template()` when cutting.
+        """
+        log.debug('place_keys()')
+        self.placements = []
+        left_edge = -self.width/2 + self.x_pad + self.x_pcb_pad
+        row_y = -self.height/2 + self.y_pad + self.y_pcb_pad + self.key_spacing/2
+
+        for row in self.layout:
+            x = left_edge
+            for k, key in enumerate(row):
+                if 'y' in key and k == 0:
+                    row_y += key['y'] * self.key_spacing
+
+                if 'x' in key:
+                    x += key['x'] * self.key_spacing
+
+                x += key['w'] * self.key_spacing / 2
+                y = row_y
+                rotation = key.get('_r', 0)
+
+                if key['h'] > 1: # deal with vertical keys
+                    y += key['h']*self.key_spacing/2 - self.key_spacing/2
+                    if key['h'] > key['w']:
+                        rotation += 90
+
+                self.placements.append(KeyPlacement(x, y, rotation, key))
+                x += key['w'] * self.key_spacing / 2
+
+            row_y += self.key_spacing
+
+        return self.placements
+
+    @timed('init_plate')
     def init_plate(self, layer):
         """Return a basic plate with the features that are common to all layers.
         """
         log.debug("init_plate(layer='%s')" % layer)
+        if self.backend == 'cadquery':
+            load_cadquery()
 
         # Basic plate info
         inset = self.layers[layer].get('inset', False)
         oversize = self.layers[layer].get('oversize', 0)
         width = self.inside_width-self.kerf*2+oversize if inset else self.width+self.kerf*2+oversize
         height = self.inside_height-self.kerf*2+oversize if inset else self.height+self.kerf*2+oversize
-
-        self.plate = cadquery.Workplane("front").box(width, height, self.layers[layer].get('thickness', 1.5))
+        thickness = self.layers[layer].get('thickness', 1.5)
 
         # Check to see if this layer overrides any screw defaults
         self.layer_screw = self.screw.copy()  # Reset this in case a previous layer changed something
@@ -547,40 +1114,96 @@ class KeyboardCase(object):
             if 'radius' in self.layers[layer]['screw']:
                 self.layer_screw['radius'] = self.layers[layer]['screw']['radius']
 
-        # Cut the corners if necessary
-        if not inset and self.corners > 0 and self.corner_type == 'round':
-            self.plate = self.plate.edges("|Z").fillet(self.corners)
-
-        self.plate = self.plate.faces("<Z").workplane()
-
-        if not inset and self.corners > 0:
-            if self.corner_type == 'bevel':
-                # Lower right corner
-                points = (
-                    (self.horizontal_edge + self.kerf, self.vertical_edge + self.kerf - self.corners), (self.horizontal_edge + self.kerf, self.vertical_edge + self.kerf),
-                    (self.horizontal_edge + self.kerf - self.corners, self.vertical_edge + self.kerf), (self.horizontal_edge + self.kerf, self.vertical_edge + self.kerf - self.corners),
-                )
-                self.plate = self.plate.polyline(points)
-                # Lower left corner
-                points = (
-                    (-self.horizontal_edge - self.kerf, self.vertical_edge + self.kerf - self.corners), (-self.horizontal_edge - self.kerf, self.vertical_edge + self.kerf),
-                    (-self.horizontal_edge - self.kerf + self.corners, self.vertical_edge + self.kerf), (-self.horizontal_edge - self.kerf, self.vertical_edge + self.kerf - self.corners),
-                )
-                self.plate = self.plate.polyline(points)
-                # Upper right corner
-                points = (
-                    (self.horizontal_edge + self.kerf, -self.vertical_edge - self.kerf + self.corners), (self.horizontal_edge + self.kerf, -self.vertical_edge - self.kerf),
-                    (self.horizontal_edge + self.kerf - self.corners, -self.vertical_edge - self.kerf), (self.horizontal_edge + self.kerf, -self.vertical_edge - self.kerf + self.corners),
-                )
-                self.plate = self.plate.polyline(points)
-                # Upper left corner
-                points = (
-                    (-self.horizontal_edge - self.kerf, -self.vertical_edge - self.kerf + self.corners), (-self.horizontal_edge - self.kerf, -self.vertical_edge - self.kerf),
-                    (-self.horizontal_edge - self.kerf + self.corners, -self.vertical_edge - self.kerf), (-self.horizontal_edge - self.kerf, -self.vertical_edge - self.kerf + self.corners),
-                )
-                self.plate = self.plate.polyline(points)
-            elif self.corner_type != 'round':
-                log.error('Unknown corner type %s!', self.corner_type)
+        self.plate = self.base_plate(width, height, thickness, inset)
+        self.origin = (0,0)
+
+        # Cut any specified holes
+        if 'holes' in self.layers[layer]:
+            self.cut_plate_holes(layer)
+
+        # Cut any specified polygons
+        if 'polygons' in self.layers[layer]:
+            self.cut_plate_polygons(layer)
+
+        # Draw the USB cutout
+        if self.layers[layer].get('usb_cutout'):
+            self.cut_usb_hole(layer)
+
+        self.origin = (0,0)
+        self.plate = self.cut_thru_all()
+        return self.plate
+
+    def base_plate(self, width, height, thickness, inset):
+        """Returns a copy of the plate outline with its corners and mount holes cut.
+
+        Layers with the same size and screw settings share a base plate, so
+        the fillet and mount holes are only cut once.
+        """
+        key = (width, height, thickness, inset, self.layer_screw['count'], self.layer_screw['radius'])
+        if key not in self.base_plates:
+            self.base_plates[key] = self.create_base_plate(width, height, thickness, inset)
+        base = self.base_plates[key]
+
+        if self.backend == '2d':
+            return base.copy()
+
+        return self.workplane(base, thickness)
+
+    def workplane(self, solid, thickness):
+        """Returns a fresh workplane on the bottom face of a plate, like faces("<Z").workplane() does.
+        """
+        plane = cadquery.Plane((0, 0, -thickness/2.0), (1, 0, 0), (0, 0, -1))
+        return cadquery.Workplane(plane).newObject([solid])
+
+    @timed('base_plate')
+    def create_base_plate(self, width, height, thickness, inset):
+        """Build a base plate for base_plate().
+
+        Returns a Plate2D for the 2d backend, or the solid for cadquery.
+        """
+        log.debug("create_base_plate(width='%s', height='%s', thickness='%s', inset='%s')", width, height, thickness, inset)
+        if self.backend == '2d':
+            # Round and beveled corners are part of the 2D outline
+            self.plate = Plate2D(width, height, 0 if inset else self.corners, self.corner_type)
+        else:
+            self.plate = cadquery.Workplane("front").box(width, height, thickness)
+
+        if self.backend == 'cadquery':
+            # Cut the corners if necessary
+            if not inset and self.corners > 0 and self.corner_type == 'round':
+                with self.timer.stage('fillet'):
+                    self.plate = self.plate.edges("|Z").fillet(self.corners)
+
+            self.plate = self.plate.faces("<Z").workplane()
+
+            if not inset and self.corners > 0:
+                if self.corner_type == 'bevel':
+                    # Lower right corner
+                    points = (
+                        (self.horizontal_edge + self.kerf, self.vertical_edge + self.kerf - self.corners), (self.horizontal_edge + self.kerf, self.vertical_edge + self.kerf),
+                        (self.horizontal_edge + self.kerf - self.corners, self.vertical_edge + self.kerf), (self.horizontal_edge + self.kerf, self.vertical_edge + self.kerf - self.corners),
+                    )
+                    self.plate = self.plate.polyline(points)
+                    # Lower left corner
+                    points = (
+                        (-self.horizontal_edge - self.kerf, self.vertical_edge + self.kerf - self.corners), (-self.horizontal_edge - self.kerf, self.vertical_edge + self.kerf),
+                        (-self.horizontal_edge - self.kerf + self.corners, self.vertical_edge + self.kerf), (-self.horizontal_edge - self.kerf, self.vertical_edge + self.kerf - self.corners),
+                    )
+                    self.plate = self.plate.polyline(points)
+                    # Upper right corner
+                    points = (
+                        (self.horizontal_edge + self.kerf, -self.vertical_edge - self.kerf + self.corners), (self.horizontal_edge + self.kerf, -self.vertical_edge - self.kerf),
+                        (self.horizontal_edge + self.kerf - self.corners, -self.vertical_edge - self.kerf), (self.horizontal_edge + self.kerf, -self.vertical_edge - self.kerf + self.corners),
+                    )
+                    self.plate = self.plate.polyline(points)
+                    # Upper left corner
+                    points = (
+                        (-self.horizontal_edge - self.kerf, -self.vertical_edge - self.kerf + self.corners), (-self.horizontal_edge - self.kerf, -self.vertical_edge - self.kerf),
+                        (-self.horizontal_edge - self.kerf + self.corners, -self.vertical_edge - self.kerf), (-self.horizontal_edge - self.kerf, -self.vertical_edge - self.kerf + self.corners),
+                    )
+                    self.plate = self.plate.polyline(points)
+                elif self.corner_type != 'round':
+                    log.error('Unknown corner type %s!', self.corner_type)
 
         # Cut the mount holes in the plate
         if inset or not self.case_type or self.case_type == 'reinforcing':
@@ -618,21 +1241,10 @@ class KeyboardCase(object):
         else:
             log.error('Unknown case type: %s', self.case_type)
 
-        # Cut any specified holes
-        if 'holes' in self.layers[layer]:
-            self.cut_plate_holes(layer)
-
-        # Cut any specified polygons
-        if 'polygons' in self.layers[layer]:
-            self.cut_plate_polygons(layer)
-
-        # Draw the USB cutout
-        if self.layers[layer].get('usb_cutout'):
-            self.cut_usb_hole(layer)
-
         self.origin = (0,0)
-        self.plate = self.plate.cutThruAll()
-        return self.plate
+        self.plate = self.cut_thru_all()
+
+        return self.plate if self.backend == '2d' else self.plate.val()
 
     def layout_sandwich_holes(self):
         """Determine where screw holes should be placed.
@@ -661,30 +1273,27 @@ class KeyboardCase(object):
             else:
                 log.error('Invalid hole configuration! Need at least 4 holes and must be divisible by 2!')
 
-    def rotate_points(self, points, radians, rotate_point):
+    @timed('rotate')
+    def rotate_points(self, points, degrees, rotate_point=(0,0)):
         """Rotate a sequence of points.
 
         points: the points to rotate
 
-        radians: the number of degrees to rotate
+        degrees: the number of degrees to rotate
 
         rotate_point: the coordinate to rotate around
         """
-        log.debug("rotate_points(points='%s', radians='%s', rotate_point='%s')", points, radians, rotate_point)
+        log.debug("rotate_points(points='%s', degrees='%s', rotate_point='%s')", points, degrees, rotate_point)
+        (xx, xy), (yx, yy) = rotation_matrix(degrees)
+        cx, cy = rotate_point
 
-        def calculate_point(point):
-            log.debug("calculate_point(point='%s')", point)
-            return (
-                math.cos(math.radians(radians)) * (point[0]-rotate_point[0]) - math.sin(math.radians(radians)) * (point[1]-rotate_point[1]) + rotate_point[0],
-                math.sin(math.radians(radians)) * (point[0]-rotate_point[0]) + math.cos(math.radians(radians)) * (point[1]-rotate_point[1]) + rotate_point[1]
-            )
-
-        return map(calculate_point, points)
+        return [(xx*(x-cx) + xy*(y-cy) + cx, yx*(x-cx) + yy*(y-cy) + cy) for x, y in points]
 
+    @timed('cut_switch')
     def cut_switch(self, switch_coord, key=None, layer='switch'):
         """Cut a switch opening
 
-        switch_coord: Center of the switch
+        switch_coord: Center of the switch, relative to the center of the plate
 
         key: A dictionary describing this key, if not provided a 1u key at 0,0 will be used.
 
@@ -694,6 +1303,34 @@ class KeyboardCase(object):
         if not key:
             key = {}
 
+        self.plate = self.center(switch_coord[0] - self.origin[0], switch_coord[1] - self.origin[1])
+        if self.backend == '2d' or self.cut_mode == 'batch':
+            # A 2d plate can't cut one hole into another, and a batched cut
+            # isn't reliable when its wires overlap, so they're merged up front
+            self.cut_polylines(*self.merged_template(self.cutout_template_key(key, layer)))
+        else:
+            # The first cut is the switch, the rest are for its stabilizer
+            cuts = self.cutout_template(key, layer)
+            self.cut_polylines(*cuts[0])
+            if len(cuts) > 1:
+                with self.timer.stage('stab'):
+                    for polylines in cuts[1:]:
+                        self.cut_polylines(*polylines)
+
+        return self.plate
+
+    def cutout_template(self, key, layer):
+        """Returns the cutouts for a key, relative to the center of the key.
+
+        The result is a tuple of cuts, each of which is a tuple of polylines
+        that get cut together. Every distinct combination of cutout settings
+        is only computed once, after that the cached template is returned.
+        """
+        return self.get_cutout_template(self.cutout_template_key(key, layer))
+
+    def cutout_template_key(self, key, layer):
+        """Returns the combination of settings that decide what gets cut for a key.
+        """
         width = key['w'] if 'w' in key else 1
         height = key['h'] if 'h' in key else 1
         switch_type = key['_t'] if '_t' in key else self.switch_type
@@ -703,12 +1340,48 @@ class KeyboardCase(object):
         rotate_stab = key['_rs'] if '_rs' in key else None
         center_offset = key['_co'] if '_co' in key else False
 
+        return (switch_type, stab_type, width, height, 'h' in key, kerf, layer, rotate_key, rotate_stab, center_offset)
+
+    def get_cutout_template(self, template_key):
+        """Returns the cached template for a cutout_template_key(), creating it if needed.
+        """
+        if template_key not in self.cutout_templates:
+            log.debug("cutout_template(template_key='%s')", template_key)
+            self.cutout_templates[template_key] = self.create_cutout_template(*template_key)
+
+        return self.cutout_templates[template_key]
+
+    def merged_template(self, template_key):
+        """Returns the polylines of a cutout template with the overlapping ones merged together.
+
+        A switch and its stabilizer usually overlap, so this is one polyline
+        for most keys. Like the templates, each result is only computed once.
+        """
+        if template_key not in self.merged_templates:
+            polylines = [points for cut in self.get_cutout_template(template_key) for points in cut]
+            self.merged_templates[template_key] = union_polygons(polylines)
+
+        return self.merged_templates[template_key]
+
+    def create_cutout_template(self, switch_type, stab_type, width, height, has_height, kerf, layer, rotate_key, rotate_stab, center_offset):
+        """Draw the switch and stabilizer cutouts for a key centered on 0,0.
+
+        This should only be called by `cutout_template()`, which caches the result.
+        """
+        switch_start = time()
+        cutouts = []
+
         # cut switch cutout
         rotate = None
-        if 'h' in key and height > width:
+        if has_height and height > width:
             rotate = True
         points = []
 
+        # Fold the rotation of vertical keys into the user rotation, so every
+        # cutout is rotated in a single pass.
+        switch_rotation = (90 if rotate else 0) + (rotate_key or 0)
+        stab_rotation = (90 if rotate else 0) + (rotate_stab or 0)
+
         # Standard locations with no offset
         mx_height = 7 - kerf
         mx_width = 7 - kerf
@@ -784,16 +1457,12 @@ class KeyboardCase(object):
             length = height
 
         if length >= 2:
+            if length not in STABILIZERS:
+                log.warning('No stabilizer spacing for %sU keys, using the 2U spacing!', length)
             x = STABILIZERS[length][0] if length in STABILIZERS else STABILIZERS[2][0]
             if not center_offset:
                 center_offset = STABILIZERS[length][1] if length in STABILIZERS else 0
 
-        if center_offset > 0:
-            # If the user has specified an offset stab (EG, 6U) we first move
-            # to cut the offset switch hole, and later will move back to cut
-            # the stabilizer.
-            self.plate.center(center_offset, 0)
-
         if switch_type == 'mx':
             points = [
                 (mx_width+self.grow_x,-mx_height-self.grow_y),
@@ -899,24 +1568,23 @@ class KeyboardCase(object):
                 (alps_width,-alps_height),
             ]
 
-        if rotate:
-            points = self.rotate_points(points, 90, (0,0))
-        if rotate_key:
-            points = self.rotate_points(points, rotate_key, (0,0))
-
-        self.plate = self.center(switch_coord[0], switch_coord[1]).polyline(points).cutThruAll()
-
+        if switch_rotation:
+            points = self.rotate_points(points, switch_rotation)
         if center_offset > 0:
-            # Move back to the center of the key/stabilizer
-            self.plate.center(-center_offset, 0)
+            # If the user has specified an offset stab (EG, 6U) the switch
+            # hole is offset from the center of the stabilizer.
+            points = [(point[0] + center_offset, point[1]) for point in points]
+
+        cutouts.append((tuple(points),))
+        self.timer.record('cutout_switch', switch_start)
+        stab_start = time()
 
         # Cut stabilizers. We have different sections for 2U vs other sizes
         # because cherry 2U stabs are shaped differently from larger stabs.
         # This should be refactored for better readability.
         if layer == 'top':
             # Don't cut stabs on top
-            self.x_off += switch_coord[0]
-            return self.plate
+            return tuple(cutouts)
 
         elif (width >= 2 and width < 3) or (rotate and height >= 2 and height < 3):
             # Cut 2 unit stabilizer cutout
@@ -968,11 +1636,9 @@ class KeyboardCase(object):
                     (-mx_width,-mx_height),
                     (mx_width,-mx_height)
                 ]
-                if rotate:
-                    points = self.rotate_points(points, 90, (0,0))
-                if rotate_stab:
-                    points = self.rotate_points(points, rotate_stab, (0,0))
-                self.plate = self.plate.polyline(points).cutThruAll()
+                if stab_rotation:
+                    points = self.rotate_points(points, stab_rotation)
+                cutouts.append((tuple(points),))
             elif stab_type == 'cherry':
                 points = [
                     (mx_stab_inside_x,-mx_stab_inside_y),
@@ -1005,11 +1671,9 @@ class KeyboardCase(object):
                     (-mx_stab_inside_x,-mx_stab_inside_y),
                     (mx_stab_inside_x,-mx_stab_inside_y),
                 ]
-                if rotate:
-                    points = self.rotate_points(points, 90, (0,0))
-                if rotate_stab:
-                    points = self.rotate_points(points, rotate_stab, (0,0))
-                self.plate = self.plate.polyline(points).cutThruAll()
+                if stab_rotation:
+                    points = self.rotate_points(points, stab_rotation)
+                cutouts.append((tuple(points),))
             elif stab_type == 'costar':
                 points_l = [
                     (-stab_4,-stab_5),
@@ -1025,14 +1689,10 @@ class KeyboardCase(object):
                     (stab_4,stab_12),
                     (stab_4,-stab_5)
                 ]
-                if rotate:
-                    points_l = self.rotate_points(points_l, 90, (0,0))
-                    points_r = self.rotate_points(points_r, 90, (0,0))
-                if rotate_stab:
-                    points_l = self.rotate_points(points_l, rotate_stab, (0,0))
-                    points_r = self.rotate_points(points_r, rotate_stab, (0,0))
-                self.plate = self.plate.polyline(points_l)
-                self.plate = self.plate.polyline(points_r).cutThruAll()
+                if stab_rotation:
+                    points_l = self.rotate_points(points_l, stab_rotation)
+                    points_r = self.rotate_points(points_r, stab_rotation)
+                cutouts.append((tuple(points_l), tuple(points_r)))
             elif stab_type in ('alps', 'matias'):
                 points_r = [
                     (alps_stab_inside_x, alps_stab_top_y),
@@ -1049,14 +1709,10 @@ class KeyboardCase(object):
                     (-alps_stab_inside_x, alps_stab_top_y)
                 ]
 
-                if rotate:
-                    points_l = self.rotate_points(points_l, 90, (0,0))
-                    points_r = self.rotate_points(points_r, 90, (0,0))
-                if rotate_stab:
-                    points_l = self.rotate_points(points_l, rotate_stab, (0,0))
-                    points_r = self.rotate_points(points_r, rotate_stab, (0,0))
-                self.plate = self.plate.polyline(points_l)
-                self.plate = self.plate.polyline(points_r).cutThruAll()
+                if stab_rotation:
+                    points_l = self.rotate_points(points_l, stab_rotation)
+                    points_r = self.rotate_points(points_r, stab_rotation)
+                cutouts.append((tuple(points_l), tuple(points_r)))
             else:
                 log.error('Unknown stab type %s! No stabilizer cut', stab_type)
 
@@ -1102,11 +1758,9 @@ class KeyboardCase(object):
                     (-x+stab_cherry_half_width,-stab_y_wire),
                     (x-stab_cherry_half_width,-stab_y_wire)
                 ]
-                if rotate:
-                    points = self.rotate_points(points, 90, (0,0))
-                if rotate_stab:
-                    points = self.rotate_points(points, rotate_stab, (0,0))
-                self.plate = self.plate.polyline(points).cutThruAll()
+                if stab_rotation:
+                    points = self.rotate_points(points, stab_rotation)
+                cutouts.append((tuple(points),))
             elif stab_type == 'cherry':
                 points = [
                     (x - stab_cherry_half_width, -stab_y_wire),#1
@@ -1139,11 +1793,9 @@ class KeyboardCase(object):
                     (-x + stab_cherry_half_width, -stab_y_wire),#28
                     (x - stab_cherry_half_width, -stab_y_wire),#1
                 ]
-                if rotate:
-                    points = self.rotate_points(points, 90, (0,0))
-                if rotate_stab:
-                    points = self.rotate_points(points, rotate_stab, (0,0))
-                self.plate = self.plate.polyline(points).cutThruAll()
+                if stab_rotation:
+                    points = self.rotate_points(points, stab_rotation)
+                cutouts.append((tuple(points),))
             elif stab_type in ('costar', 'matias'):
                 points_l = [
                     (-x+stab_cherry_bottom_wing_half_width,-stab_5),
@@ -1159,14 +1811,10 @@ class KeyboardCase(object):
                     (x-stab_cherry_bottom_wing_half_width,stab_12),
                     (x-stab_cherry_bottom_wing_half_width,-stab_5)
                 ]
-                if rotate:
-                    points_l = self.rotate_points(points_l, 90, (0,0))
-                    points_r = self.rotate_points(points_r, 90, (0,0))
-                if rotate_stab:
-                    points_l = self.rotate_points(points_l, rotate_stab, (0,0))
-                    points_r = self.rotate_points(points_r, rotate_stab, (0,0))
-                self.plate = self.plate.polyline(points_l)
-                self.plate = self.plate.polyline(points_r).cutThruAll()
+                if stab_rotation:
+                    points_l = self.rotate_points(points_l, stab_rotation)
+                    points_r = self.rotate_points(points_r, stab_rotation)
+                cutouts.append((tuple(points_l), tuple(points_r)))
             elif stab_type == 'alps':
                 # Alps stabilizers
                 if width == 6.5:
@@ -1191,18 +1839,35 @@ class KeyboardCase(object):
                     (-inside_x, alps_stab_top_y)
                 ]
 
-                if rotate:
-                    points_l = self.rotate_points(points_l, 90, (0, 0))
-                    points_r = self.rotate_points(points_r, 90, (0, 0))
-                if rotate_stab:
-                    points_l = self.rotate_points(points_l, rotate_stab, (0, 0))
-                    points_r = self.rotate_points(points_r, rotate_stab, (0, 0))
-                self.plate = self.plate.polyline(points_l)
-                self.plate = self.plate.polyline(points_r).cutThruAll()
+                if stab_rotation:
+                    points_l = self.rotate_points(points_l, stab_rotation)
+                    points_r = self.rotate_points(points_r, stab_rotation)
+                cutouts.append((tuple(points_l), tuple(points_r)))
             else:
                 log.error('Unknown stab type %s! No stabilizer cut', stab_type)
 
-        self.x_off += switch_coord[0]
+        self.timer.record('cutout_stab', stab_start)
+
+        return tuple(cutouts)
+
+    @timed('cut')
+    def cut_thru_all(self):
+        """Returns the plate with everything drawn since the last cut cut out of it.
+        """
+        return self.plate.cutThruAll()
+
+    def cut_polylines(self, *polylines):
+        """Draw one or more polylines and cut them out of the plate.
+
+        When `cut_mode` is `batch` the cut is deferred so the drawn wires
+        accumulate until the next `cutThruAll()`.
+        """
+        for points in polylines:
+            self.plate = self.plate.polyline(points)
+
+        if self.cut_mode != 'batch':
+            self.plate = self.cut_thru_all()
+
         return self.plate
 
     def recenter(self):
@@ -1243,6 +1908,16 @@ class KeyboardCase(object):
 
     def export(self, layer, directory='static/exports'):
         """Export the specified layer to the formats specified in self.formats.
+
+        Each entry in `self.exports[layer]` records how many `seconds` it
+        took to write. With more than one of the js, brp, stp and stl formats
+        the plate is serialized once and those formats are written at the same
+        time, each in its own process. The processes are started the first
+        time they're needed and kept for every layer, see close().
+
+        The cadquery backend only writes the layer's BREP for `lazy_formats`,
+        and lists them with `lazy` set. export_brep() writes them later on. The
+        2d backend writes its lazy formats right away, since they're cheap.
         """
         log.debug("export(layer='%s', directory='%s')", layer, directory)
         log.info("Exporting %s layer for %s", layer, self.name)
@@ -1254,45 +1929,91 @@ class KeyboardCase(object):
             makedirs(dirname)
 
         # Cut anything drawn on the plate
-        self.plate = self.plate.cutThruAll()
-
-        # draw the part so we can export it
-        Part.show(self.plate.val().wrapped)
-        doc = FreeCAD.ActiveDocument
-
-        # export the drawing into different formats
-        if 'js' in self.formats:
-            with open(basename+".js", "w") as f:
-                cadquery.exporters.exportShape(self.plate, 'TJS', f)
-                self.exports[layer].append({'name': 'js', 'url': '/'+basename+'.js'})
-                log.info("Exported 'JS' to %s.js", basename)
-        if 'brp' in self.formats:
-            Part.export(doc.Objects, basename+".brp")
-            self.exports[layer].append({'name': 'brp', 'url': '/'+basename+'.brp'})
-            log.info("Exported 'BRP' to %s.brp", basename)
-        if 'stp' in self.formats:
-            Part.export(doc.Objects, basename+".stp")
-            self.exports[layer].append({'name': 'stp', 'url': '/'+basename+'.stp'})
-            log.info("Exported 'STP' to %s.stp", basename)
-        if 'stl' in self.formats:
-            Mesh.export(doc.Objects, basename+".stl")
-            self.exports[layer].append({'name': 'stl', 'url': '/'+basename+'.stl'})
-            log.info("Exported 'STL' to %s.stl", basename)
-        if 'dxf' in self.formats:
-            importDXF.export(doc.Objects, basename+".dxf")
-            self.exports[layer].append({'name': 'dxf', 'url': '/'+basename+'.dxf'})
-            log.info("Exported 'DXF' to %s.dxf", basename)
-        if 'svg' in self.formats:
-            importSVG.export(doc.Objects, basename+".svg")
-            self.exports[layer].append({'name': 'svg', 'url': '/'+basename+'.svg'})
-            log.info("Exported 'SVG' to %s.svg", basename)
+        self.plate = self.cut_thru_all()
+
+        contour_formats = [export_format for export_format in CONTOUR_FORMATS if export_format in self.formats]
+        if self.backend == '2d':
+            # Write the 2D formats straight from the plate's contours
+            contours = self.plate.contours()
+            contour_formats = [export_format for export_format in CONTOUR_FORMATS if export_format in self.formats + self.lazy_formats]
+            self.export_contours(layer, basename, contours, contour_formats)
+            for export_format in self.formats + self.lazy_formats:
+                if export_format not in CONTOUR_FORMATS + ('json',):
+                    log.error("Can't export '%s' with the 2d backend, use the cadquery backend instead.", export_format)
+        else:
+            load_cadquery()
+            shape = self.plate.val().wrapped
+            if contour_formats:
+                # Read the outline and holes straight off the solid
+                with self.timer.stage('export_contours'):
+                    contours = shape_contours(shape)
+                self.export_contours(layer, basename, contours, contour_formats)
+
+            lazy_formats = [export_format for export_format in self.lazy_formats if export_format not in self.formats]
+            solid_formats = [export_format for export_format in SOLID_FORMATS if export_format in self.formats or (export_format == 'brp' and lazy_formats)]
+            if len(solid_formats) > 1 and can_fork_pool():
+                with self.timer.stage('export_serialize'):
+                    brep = shape.exportBrepToString()
+                timers = self.export_pool().map(write_solid_format_job, [(brep, export_format, basename, self.tessellation.get(export_format)) for export_format in solid_formats])
+            else:
+                timers = [write_solid_format(shape, export_format, basename, self.tessellation.get(export_format)) for export_format in solid_formats]
+
+            for export_format, timer in zip(solid_formats, timers):
+                self.timer.merge(timer)
+                self.add_export(layer, basename, export_format, timer.stages['export_'+export_format]['seconds'])
+
+            for export_format in lazy_formats:
+                self.add_lazy_export(layer, basename, export_format)
+
         if 'json' in self.formats and layer == 'switch':
-            with open(basename+".json", 'w') as json_file:
-                json_file.write(repr(self))
-            self.exports[layer].append({'name': 'json', 'url': '/'+basename+'.json'})
-            log.info("Exported 'JSON' to %s.json", basename)
+            def write_json(filename):
+                with open(filename, 'w') as json_file:
+                    json_file.write(repr(self))
+            self.export_file(layer, basename, 'json', write_json)
+
+    def export_pool(self):
+        """Returns the pool export() writes solid formats with, starting it the first time.
+        """
+        if self.export_workers is None:
+            self.export_workers = multiprocessing.Pool(len(SOLID_FORMATS))
 
-        # remove all the documents from the view before we move on
-        for o in doc.Objects:
-            doc.removeObject(o.Label)
+        return self.export_workers
+
+    def close(self):
+        """Stop the processes export() started, if there are any.
+        """
+        if self.export_workers is not None:
+            self.export_workers.close()
+            self.export_workers.join()
+            self.export_workers = None
+
+    def export_contours(self, layer, basename, contours, formats):
+        """Export a layer's contours to each of formats, which are CONTOUR_FORMATS.
+        """
+        thickness = self.layers[layer].get('thickness', 1.5)
+        for export_format in formats:
+            self.export_file(layer, basename, export_format, lambda filename: write_contour_format(contours, export_format, filename, thickness, self.tessellation['outline']))
+
+    def export_file(self, layer, basename, export_format, write):
+        """Export a layer to one format by calling write(filename), and record how long it took.
+        """
+        with self.timer.stage('export_'+export_format):
+            write('%s.%s' % (basename, export_format))
+
+        self.add_export(layer, basename, export_format, self.timer.events[-1][2])
+
+    def add_export(self, layer, basename, export_format, seconds):
+        """Add a file that was written to `self.exports`.
+        """
+        self.exports[layer].append({'name': export_format, 'url': '/%s.%s' % (basename, export_format), 'seconds': seconds})
+        log.info("Exported '%s' to %s.%s", export_format.upper(), basename, export_format)
+
+    def add_lazy_export(self, layer, basename, export_format):
+        """Add a file that will be written by export_brep() when it's first asked for to `self.exports`.
+        """
+        export = {'name': export_format, 'url': '/%s.%s' % (basename, export_format), 'lazy': True}
+        if export_format in TESSELLATED_FORMATS:
+            export['tessellation'] = list(self.tessellation[export_format])
 
+        self.exports[layer].append(export)
+        log.info("Will export '%s' to %s.%s when it's asked for", export_format.upper(), basename, export_format)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Builds are exported to `<directory>/<hash>/`, where the hash is the SHA1 of
+# the layout. Once a build finishes we drop a manifest next to its files, so
+# the next time the same layout shows up we can hand back the old result
+# without doing any CAD work.
+#
+# The manifest's mtime doubles as the last time the build was used, and the
+# manifest keeps the size of the build's files. Both are read once, into an
+# index we keep up to date from then on, so adding a build doesn't have to
+# look at every other one. When the cache grows past its size limit the least
+# recently used builds are removed.
+import json
+import logging
+import os
+import shutil
+import threading
+
+from os.path import basename, exists, getmtime, getsize, isdir, join
+
+log = logging.getLogger()
+
+MANIFEST = 'manifest.json'
+
+
+class BuildCache(object):
+    """Finished builds, looked up by the hash of their layout.
+
+    directory: Where the builds are exported to
+
+    max_size: How many bytes of builds to keep around
+    """
+    def __init__(self, directory='static/exports', max_size=1024*1024*1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.index = None  # data_hash: [last_used, size], see load_index()
+        self.total_size = 0
+
+    def manifest_file(self, data_hash):
+        """Returns the path to the manifest for a build.
+        """
+        return join(self.directory, data_hash, MANIFEST)
+
+    def export_file(self, data_hash, url):
+        """Returns the path to one of a build's exports, from its url.
+        """
+        return join(self.directory, data_hash, basename(url))
+
+    def write_manifest(self, manifest):
+        """Write a build's manifest. Call with self.lock held.
+        """
+        manifest_file = self.manifest_file(manifest['hash'])
+
+        # Write it somewhere else first so a half written manifest is never read
+        with open(manifest_file + '.tmp', 'w') as f:
+            json.dump(manifest, f, sort_keys=True, indent=4, separators=(',', ': '))
+        os.rename(manifest_file + '.tmp', manifest_file)
+
+    def get(self, data_hash):
+        """Returns the stored result for a build, or None if we don't have it.
+
+        A build only counts if every file it exported is still there. Lazy
+        exports are only written when they're asked for, so they don't count.
+        """
+        manifest_file = self.manifest_file(data_hash)
+        with self.lock:
+            if not exists(manifest_file):
+                return None
+
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+
+            for exports in manifest['result']['exports'].values():
+                for export in exports:
+                    if not export.get('lazy') and not exists(self.export_file(data_hash, export['url'])):
+                        log.warning('Build %s is missing %s, rebuilding it.', data_hash, export['url'])
+                        return None
+
+            os.utime(manifest_file, None)  # Mark it as recently used
+            if self.index is not None and data_hash in self.index:
+                self.index[data_hash][0] = getmtime(manifest_file)
+
+        log.info('Using the cached build for %s', data_hash)
+        return manifest['result']
+
+    def put(self, data_hash, result, in_use=()):
+        """Store the result of a finished build, then make room if needed.
+
+        in_use: The hashes of builds that are being built or exported right
+        now, which are never removed to make room
+        """
+        manifest = {
+            'hash': data_hash,
+            'layers': result['plates'],
+            'formats': result['formats'],
+            'result': result,
+            'size': self.build_size(data_hash)
+        }
+
+        with self.lock:
+            self.load_index()
+            self.write_manifest(manifest)
+            self.total_size += manifest['size'] - self.index.get(data_hash, [0, 0])[1]
+            self.index[data_hash] = [getmtime(self.manifest_file(data_hash)), manifest['size']]
+            self.evict(keep=data_hash, in_use=in_use)
+
+    def add_file(self, data_hash, url):
+        """Count a file that was written after the build was cached, like a lazy export, towards its size.
+        """
+        manifest_file = self.manifest_file(data_hash)
+        with self.lock:
+            if not exists(manifest_file):
+                return
+
+            size = getsize(self.export_file(data_hash, url))
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            manifest['size'] = manifest.get('size', 0) + size
+            self.write_manifest(manifest)
+
+            if self.index is not None and data_hash in self.index:
+                self.index[data_hash] = [getmtime(manifest_file), self.index[data_hash][1] + size]
+                self.total_size += size
+
+    def build_size(self, data_hash):
+        """Returns how many bytes the exported files of a build take up.
+        """
+        size = 0
+        for root, dirs, files in os.walk(join(self.directory, data_hash)):
+            size += sum(getsize(join(root, name)) for name in files if not name.startswith(MANIFEST))
+
+        return size
+
+    def load_index(self):
+        """Read the last use and size of every cached build, the first time it's needed. Call with self.lock held.
+        """
+        if self.index is not None:
+            return
+
+        self.index = {}
+        for data_hash in os.listdir(self.directory):
+            build_dir = join(self.directory, data_hash)
+            manifest_file = join(build_dir, MANIFEST)
+            if not isdir(build_dir) or not exists(manifest_file):
+                continue  # Not a build, or one that hasn't finished yet
+
+            with open(manifest_file) as f:
+                size = json.load(f).get('size')
+            if size is None:
+                size = self.build_size(data_hash)  # Cached before we kept track
+            self.index[data_hash] = [getmtime(manifest_file), size]
+
+        self.total_size = sum(size for last_used, size in self.index.values())
+
+    def builds(self):
+        """Returns a list of (last_used, size, data_hash) for every cached build.
+        """
+        with self.lock:
+            self.load_index()
+            return [(last_used, size, data_hash) for data_hash, (last_used, size) in self.index.items()]
+
+    def evict(self, keep=None, in_use=()):
+        """Remove the least recently used builds until we fit in max_size. Call with self.lock held.
+
+        keep: A build that should never be removed, usually the newest one
+
+        in_use: More builds that can't be removed right now
+        """
+        if self.total_size <= self.max_size:
+            return
+
+        for last_used, size, data_hash in sorted((last_used, size, data_hash) for data_hash, (last_used, size) in self.index.items()):
+            if self.total_size <= self.max_size:
+                break
+            if data_hash == keep or data_hash in in_use:
+                continue
+
+            log.info('Removing the cached build for %s', data_hash)
+            shutil.rmtree(join(self.directory, data_hash), ignore_errors=True)
+            del self.index[data_hash]
+            self.total_size -= size
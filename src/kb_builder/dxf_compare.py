@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compare DXF files by their geometry instead of byte for byte, so the golden
+# tests can check our files against the ones FreeCAD wrote. Lines that are
+# split in two, or arcs that are split in pieces, still count as the same.
+# Only the tests use this.
+import math
+
+from .exporters import is_circle
+from .plate2d import arc_center
+
+
+def read_dxf(filename):
+    """Returns the geometry of a DXF file as a list of segments.
+
+    Reads the LINE, ARC, CIRCLE, LWPOLYLINE and POLYLINE entities that we and
+    FreeCAD write. Each segment is one of:
+
+    * ('line', (x1, y1), (x2, y2))
+    * ('arc', (cx, cy), radius, start_angle, end_angle), counterclockwise in degrees
+    * ('circle', (cx, cy), radius)
+    """
+    with open(filename) as dxf:
+        lines = [line.strip() for line in dxf]
+
+    entities = []
+    for code, value in zip(lines[0::2], lines[1::2]):
+        if code == '0':
+            entities.append((value, []))
+        elif entities:
+            entities[-1][1].append((int(code), value))
+
+    segments = []
+    vertices = None  # The vertices of the POLYLINE we're reading
+    for name, groups in entities:
+        values = {}
+        for code, value in groups:
+            values.setdefault(code, value)
+
+        if name == 'LINE':
+            segments.append(('line', (float(values[10]), float(values[20])), (float(values[11]), float(values[21]))))
+        elif name == 'ARC':
+            segments.append(('arc', (float(values[10]), float(values[20])), float(values[40]), float(values[50]), float(values[51])))
+        elif name == 'CIRCLE':
+            segments.append(('circle', (float(values[10]), float(values[20])), float(values[40])))
+        elif name == 'LWPOLYLINE':
+            contour = []
+            for code, value in groups:
+                if code == 10:
+                    contour.append([float(value), 0.0, 0.0])
+                elif code == 20:
+                    contour[-1][1] = float(value)
+                elif code == 42:
+                    contour[-1][2] = float(value)
+            segments.extend(contour_segments(contour))
+        elif name == 'POLYLINE':
+            vertices = []
+        elif name == 'VERTEX' and vertices is not None:
+            vertices.append([float(values[10]), float(values[20]), float(values.get(42, 0))])
+        elif name == 'SEQEND' and vertices is not None:
+            segments.extend(contour_segments(vertices))
+            vertices = None
+
+    return segments
+
+
+def contour_segments(contour):
+    """Returns the segments, like read_dxf() does, for a closed contour.
+    """
+    if is_circle(contour):
+        center, radius = arc_center(contour[0], contour[1], 1)
+        return [('circle', center, radius)]
+
+    segments = []
+    for i, start in enumerate(contour):
+        end = contour[(i + 1) % len(contour)]
+        bulge = start[2]
+        if not bulge:
+            segments.append(('line', (start[0], start[1]), (end[0], end[1])))
+            continue
+
+        center, radius = arc_center(start, end, bulge)
+        start_angle = math.degrees(math.atan2(start[1] - center[1], start[0] - center[0]))
+        end_angle = math.degrees(math.atan2(end[1] - center[1], end[0] - center[0]))
+        if bulge < 0:
+            start_angle, end_angle = end_angle, start_angle  # Store every arc counterclockwise
+        segments.append(('arc', center, radius, start_angle, end_angle))
+
+    return segments
+
+
+def normalize_segments(segments, tolerance):
+    """Returns segments in a form that doesn't depend on how they were drawn.
+
+    Lines that continue each other are joined, arcs get their angles in
+    [0, 360), and arcs that make up a whole circle become the circle.
+    """
+    lines = {}  # (angle, offset): [(start, end)] along the line
+    arcs = []
+    normalized = []
+    for segment in segments:
+        if segment[0] == 'line':
+            (x1, y1), (x2, y2) = segment[1], segment[2]
+            length = math.hypot(x2 - x1, y2 - y1)
+            if length < tolerance:
+                continue
+            dx, dy = (x2 - x1) / length, (y2 - y1) / length
+            if dx < -1e-9 or (abs(dx) <= 1e-9 and dy < 0):
+                dx, dy = -dx, -dy
+            offset = x1 * dy - y1 * dx
+            key = (round(dx, 6), round(dy, 6), round(offset / tolerance))
+            along = sorted((x1 * dx + y1 * dy, x2 * dx + y2 * dy))
+            lines.setdefault(key, []).append((along, (dx, dy, offset)))
+        elif segment[0] == 'arc':
+            center, radius, start, end = segment[1:]
+            arcs.append((center, radius, start % 360, end % 360))
+        else:
+            normalized.append(segment)
+
+    for spans in lines.values():
+        spans.sort()
+        dx, dy, offset = spans[0][1]
+        merged = []
+        for (start, end), direction in spans:
+            if merged and start <= merged[-1][1] + tolerance:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        for start, end in merged:
+            # Turn the distances along the line back into points
+            normalized.append(('line', (start * dx + offset * dy, start * dy - offset * dx), (end * dx + offset * dy, end * dy - offset * dx)))
+
+    # Join arcs on the same circle that continue each other
+    while arcs:
+        center, radius, start, end = arcs.pop()
+        joined = True
+        while joined:
+            joined = False
+            for i, (other_center, other_radius, other_start, other_end) in enumerate(arcs):
+                if max(abs(center[0] - other_center[0]), abs(center[1] - other_center[1]), abs(radius - other_radius)) > tolerance:
+                    continue
+                if abs((end - other_start + 180) % 360 - 180) < 1e-3:
+                    end = other_end
+                elif abs((other_end - start + 180) % 360 - 180) < 1e-3:
+                    start = other_start
+                else:
+                    continue
+                del arcs[i]
+                joined = True
+                break
+
+        if abs((end - start + 180) % 360 - 180) < 1e-3:
+            normalized.append(('circle', center, radius))
+        else:
+            normalized.append(('arc', center, radius, start, end))
+
+    return normalized
+
+
+def dxf_differences(filename, reference, tolerance=0.001):
+    """Compare the geometry of two DXF files, whatever entities they use.
+
+    Returns a list of the segments that are only in one of the files, so an
+    empty list means they describe the same shapes.
+    """
+    def numbers(segment):
+        flat = []
+        for value in segment[1:]:
+            flat.extend(value if isinstance(value, tuple) else (value,))
+        return flat
+
+    def same(a, b):
+        if a[0] != b[0]:
+            return False
+        if a[0] == 'line' and max(abs(x - y) for x, y in zip(numbers(a), numbers(b))) > tolerance:
+            a = (a[0], a[2], a[1])  # Lines can run either way
+        for x, y in zip(numbers(a), numbers(b)):
+            if abs(x - y) > tolerance and not (a[0] == 'arc' and abs((x - y + 180) % 360 - 180) < 1e-3):
+                return False
+        return True
+
+    segments = normalize_segments(read_dxf(filename), tolerance)
+    unmatched = normalize_segments(read_dxf(reference), tolerance)
+    differences = []
+    for segment in segments:
+        for i, other in enumerate(unmatched):
+            if same(segment, other):
+                del unmatched[i]
+                break
+        else:
+            differences.append(('only in %s' % filename,) + segment)
+
+    return differences + [('only in %s' % reference,) + segment for segment in unmatched]
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Writers for the 2D formats. These work on the contours described in
+# plate2d.py, so they don't need FreeCAD at all.
+import json
+
+from .plate2d import arc_center, contour_bounds
+
+OUTLINE_VERSION = 1
+
+
+def format_number(value):
+    """Returns a short string for a coordinate, rounded to a micron.
+    """
+    return repr(round(value, 6) + 0.0)  # + 0.0 turns -0.0 into 0.0
+
+
+def is_circle(contour):
+    """Returns True for a contour made of two half circles.
+    """
+    return len(contour) == 2 and contour[0][2] == contour[1][2] and abs(contour[0][2]) == 1
+
+
+def write_dxf(contours, filename):
+    """Write contours to an R12 DXF file, one closed POLYLINE per contour.
+
+    Arcs are kept as the bulge of the vertex they start at, and full circles
+    are written as CIRCLE entities. R12 doesn't need tables, blocks or entity
+    handles, so every CAM tool can read it. Each entity is written as soon as
+    it's ready.
+    """
+    def group(code, value):
+        return '%3d\n%s\n' % (code, value)
+
+    def point(code, x, y):
+        return group(code, format_number(x)) + group(code + 10, format_number(y)) + group(code + 20, '0.0')
+
+    min_x, min_y, max_x, max_y = contour_bounds(contours)
+
+    with open(filename, 'w') as dxf:
+        dxf.write(group(0, 'SECTION') + group(2, 'HEADER'))
+        dxf.write(group(9, '$ACADVER') + group(1, 'AC1009'))
+        dxf.write(group(9, '$INSBASE') + point(10, 0, 0))
+        dxf.write(group(9, '$EXTMIN') + point(10, min_x, min_y))
+        dxf.write(group(9, '$EXTMAX') + point(10, max_x, max_y))
+        dxf.write(group(0, 'ENDSEC'))
+        dxf.write(group(0, 'SECTION') + group(2, 'ENTITIES'))
+
+        for contour in contours:
+            if is_circle(contour):
+                (x, y), radius = arc_center(contour[0], contour[1], 1)
+                dxf.write(group(0, 'CIRCLE') + group(8, '0') + point(10, x, y) + group(40, format_number(radius)))
+                continue
+
+            entity = [group(0, 'POLYLINE'), group(8, '0'), group(66, 1), point(10, 0, 0), group(70, 1)]
+            for x, y, bulge in contour:
+                entity.append(group(0, 'VERTEX') + group(8, '0') + point(10, x, y))
+                if bulge:
+                    entity.append(group(42, format_number(bulge)))
+            entity.append(group(0, 'SEQEND') + group(8, '0'))
+            dxf.write(''.join(entity))
+
+        dxf.write(group(0, 'ENDSEC') + group(0, 'EOF'))
+
+
+def svg_path(contour):
+    """Returns the SVG path data for a single contour.
+
+    SVG has its y axis pointing down, so y is flipped and arcs that run
+    counterclockwise in the drawing get a sweep flag of 0.
+    """
+    def xy(vertex):
+        return '%s %s' % (format_number(vertex[0]), format_number(-vertex[1]))
+
+    path = ['M' + xy(contour[0])]
+    for i, start in enumerate(contour):
+        end = contour[(i + 1) % len(contour)]
+        bulge = start[2]
+        if bulge:
+            radius = format_number(arc_center(start, end, bulge)[1])
+            large_arc = 1 if abs(bulge) > 1 else 0
+            sweep = 0 if bulge > 0 else 1
+            path.append('A%s %s 0 %d %d %s' % (radius, radius, large_arc, sweep, xy(end)))
+        elif i < len(contour) - 1:
+            path.append('L' + xy(end))
+    path.append('Z')
+
+    return ''.join(path)
+
+
+def write_svg(contours, filename):
+    """Write contours to an SVG file as one <path> per contour.
+
+    Units are millimeters and the viewBox is fit to the plate.
+    """
+    min_x, min_y, max_x, max_y = contour_bounds(contours)
+    width = format_number(max_x - min_x)
+    height = format_number(max_y - min_y)
+
+    with open(filename, 'w') as svg:
+        svg.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        svg.write('<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="%smm" height="%smm" viewBox="%s %s %s %s">\n' % (width, height, format_number(min_x), format_number(-max_y), width, height))
+        svg.write('<g fill="none" stroke="#000000" stroke-width="0.1">\n')
+        for contour in contours:
+            svg.write('<path d="%s"/>\n' % svg_path(contour))
+        svg.write('</g>\n</svg>\n')
+
+
+def write_outline(contours, filename, thickness, tessellation=None, scale=1000):
+    """Write contours to a compact JSON file for the web preview to extrude.
+
+    tessellation: The (linear, angular) deflection the preview should follow
+    arcs with
+
+    Every number is an integer in 1/scale mm, or 1/scale for bulges. Each
+    contour is a flat list of x, y, bulge triples. The first vertex of a
+    contour is absolute and the rest are relative to the vertex before them,
+    which keeps the numbers short. The first contour is the plate's outline.
+    """
+    encoded = []
+    for contour in contours:
+        flat = []
+        last_x = last_y = 0
+        for x, y, bulge in contour:
+            x = int(round(x * scale))
+            y = int(round(y * scale))
+            flat.extend((x - last_x, y - last_y, int(round(bulge * scale))))
+            last_x, last_y = x, y
+        encoded.append(flat)
+
+    data = {'version': OUTLINE_VERSION, 'scale': scale, 'thickness': thickness, 'contours': encoded}
+    if tessellation:
+        data['tessellation'] = list(tessellation)
+
+    with open(filename, 'w') as outline:
+        json.dump(data, outline, separators=(',', ':'))
+
+
+def read_outline(filename):
+    """Returns the thickness and contours from a file written by write_outline().
+    """
+    with open(filename) as outline:
+        data = json.load(outline)
+
+    scale = float(data['scale'])
+    contours = []
+    for flat in data['contours']:
+        contour = []
+        x = y = 0
+        for i in range(0, len(flat), 3):
+            x += flat[i]
+            y += flat[i + 1]
+            contour.append((x / scale, y / scale, flat[i + 2] / scale))
+        contours.append(contour)
+
+    return data['thickness'], contours
@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Run builds in a pool of worker processes so a slow layout doesn't hold up
+# everyone else. The workers are started once and kept around. FreeCAD is loaded,
+# when it's installed, before the workers are forked, so it's already there
+# when a job shows up.
+import logging
+import multiprocessing
+import os
+import threading
+import traceback
+import uuid
+
+from collections import OrderedDict
+from time import time
+
+from .builder import KeyboardCase, can_fork_pool, export_brep, load_cadquery
+
+log = logging.getLogger()
+
+# The switch based layers of the last build of each lineage, so the next
+# version of a layout only recuts the keys that changed. Each process keeps its
+# own, JobQueue sends every build of a lineage to the same worker.
+LINEAGES = OrderedDict()
+MAX_LINEAGES = 16
+
+# Set in each pool worker by set_progress_queue(), so a job can report each
+# layer as soon as it's exported.
+PROGRESS = None
+
+
+class PreviousBuild(object):
+    """The part of a finished KeyboardCase that the next build of its lineage needs.
+
+    Only the plates and cutouts of the switch based layers are kept, not the
+    whole case.
+    """
+    def __init__(self, case):
+        self.switch_layers = case.switch_layers
+
+
+class BuildError(Exception):
+    """A build failed in a worker process.
+
+    The message holds the worker's traceback. FreeCAD's own exceptions
+    don't always survive the trip back from the worker, so we send text.
+    """
+
+
+def set_progress_queue(queue):
+    """Pool initializer that sets where workers send their progress.
+    """
+    global PROGRESS
+    PROGRESS = queue
+
+
+def build_layout(layout, formats=None, directory='static/exports', processes=1, trace=None, lineage=None, progress=None):
+    """Build and export every layer of a layout.
+
+    processes: How many layers to build at the same time. Each layer is built
+    from its own copy of the layout in a separate process. Inside a pool
+    worker the layers are built one after another, see can_fork_pool().
+
+    trace: A filename to write a Chrome trace of the build to
+
+    lineage: An id shared by successive versions of the same layout. When
+    this process built the lineage before, only the keys that changed are
+    recut. Layers built in parallel don't use it.
+
+    progress: Called with a dictionary holding the `layer`, its `exports`, and
+    the plate `width` and `height` as soon as each layer is exported.
+
+    Returns a dictionary describing the plates and the files that were written.
+    """
+    build_start = time()
+    case = KeyboardCase(layout, formats)
+    layers = sorted(case.layers)
+    log.info("Processing: %s", case.name)
+
+    if processes > 1 and len(layers) > 1 and can_fork_pool():
+        pool = multiprocessing.Pool(min(processes, len(layers)))
+        try:
+            layer_results = pool.imap(build_layer_job, [(layout, formats, directory, layer) for layer in layers])
+            for layer, (exports, timer) in zip(layers, layer_results):
+                if exports is not None:
+                    case.exports[layer] = exports
+                    layer_done(case, layer, progress)
+                case.timer.merge(timer)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        previous = LINEAGES.get(lineage) if lineage else None
+        try:
+            for layer in layers:
+                if case.create_layer(layer, previous) is not None:
+                    case.export(layer, directory)
+                    layer_done(case, layer, progress)
+        finally:
+            case.close()
+
+        if lineage:
+            LINEAGES.pop(lineage, None)
+            LINEAGES[lineage] = PreviousBuild(case)
+            while len(LINEAGES) > MAX_LINEAGES:
+                LINEAGES.popitem(last=False)
+
+    log.info("Finished: %s", case.name)
+    log.info("Processing took: {0:.2f} seconds".format(time()-build_start))
+    for stage, stats in sorted(case.timings.items()):
+        log.debug("Stage %s: %d calls, %.3f seconds", stage, stats['count'], stats['seconds'])
+
+    if trace:
+        case.timer.write_trace(trace)
+
+    return {
+        'name': case.name,
+        'formats': case.formats,
+        'plates': layers,
+        'exports': case.exports,
+        'width': case.width,
+        'height': case.height,
+        'inside_width': case.inside_width,
+        'inside_height': case.inside_height,
+        'timings': case.timings
+    }
+
+
+def layer_done(case, layer, progress):
+    """Tell progress, if there is one, that a layer has been exported.
+    """
+    if progress:
+        progress({'layer': layer, 'exports': case.exports[layer], 'width': case.width, 'height': case.height})
+
+
+def build_layer(layout, formats, directory, layer):
+    """Build and export a single layer of a layout.
+
+    Returns the exports for the layer, or None if it couldn't be drawn, and
+    the Timer for the build.
+    """
+    case = KeyboardCase(layout, formats)
+    if case.create_layer(layer) is None:
+        return None, case.timer
+
+    try:
+        case.export(layer, directory)
+    finally:
+        case.close()
+
+    return case.exports[layer], case.timer
+
+
+def build_layer_job(args):
+    """Worker side of build_layer(). Turns any failure into a BuildError.
+
+    Pool.map() only passes a single argument, so args is a tuple.
+    """
+    try:
+        return build_layer(*args)
+    except Exception:
+        raise BuildError(traceback.format_exc())
+
+
+def run_job(layout, formats, directory, lineage=None, build_id=None):
+    """Worker side of a job. Turns any failure into a BuildError.
+
+    The layers of a job are built one after another, see can_fork_pool().
+    Each layer is sent to the PROGRESS queue, tagged with build_id, once
+    it's exported.
+    """
+    progress = None
+    if PROGRESS is not None and build_id:
+        progress = lambda event: PROGRESS.put((build_id, event))
+
+    try:
+        return build_layout(layout, formats, directory, lineage=lineage, progress=progress)
+    except Exception:
+        raise BuildError(traceback.format_exc())
+
+
+def run_export(basename, export_format, tessellation=None):
+    """Worker side of JobQueue.export(). Turns any failure into a BuildError.
+
+    Returns the `url` of the file and how many `seconds` it took to write.
+    """
+    try:
+        timer = export_brep(basename, export_format, tessellation)
+    except Exception:
+        raise BuildError(traceback.format_exc())
+
+    return {'url': '/%s.%s' % (basename, export_format), 'seconds': timer.stages['export_'+export_format]['seconds']}
+
+
+class Build(object):
+    """A job that was sent to a worker, and the layers it has exported so far.
+
+    Behaves enough like the pool's AsyncResult for JobQueue.
+    """
+    def __init__(self, result, worker=None):
+        self.result = result
+        self.worker = worker
+        self.layers = []
+
+    def ready(self):
+        return self.result.ready()
+
+    def wait(self, timeout=None):
+        self.result.wait(timeout)
+
+    def get(self, timeout=None):
+        return self.result.get(timeout)
+
+
+class FinishedJob(object):
+    """A job that was answered without building anything.
+
+    Behaves enough like the pool's AsyncResult for JobQueue.
+    """
+    def __init__(self, result):
+        self.result = result
+        self.layers = []
+
+    def ready(self):
+        return True
+
+    def wait(self, timeout=None):
+        pass
+
+    def get(self, timeout=None):
+        return self.result
+
+
+class JobQueue(object):
+    """A set of build workers and the jobs that have been sent to them.
+
+    processes: How many layouts to build at the same time (Default: one per CPU)
+
+    max_jobs: How many jobs to remember. The oldest finished jobs are forgotten first.
+
+    cache: An optional BuildCache to check before building anything
+
+    Jobs submitted with the same cache_key while one of them is still being
+    built share that build, rather than racing each other to write the same
+    files.
+
+    Each worker is a pool with a single process. Every build of a lineage
+    goes to the same worker, which remembers the last one in LINEAGES. Other
+    jobs go to the worker with the fewest jobs that haven't finished.
+    """
+    def __init__(self, processes=None, max_jobs=1000, cache=None):
+        try:
+            load_cadquery()
+        except ImportError:
+            log.warning("Can't load cadquery, only layouts using the 2d backend can be built.")
+        self.progress = multiprocessing.Queue()
+        self.processes = processes or multiprocessing.cpu_count()
+        self.workers = [multiprocessing.Pool(1, set_progress_queue, (self.progress,)) for i in range(self.processes)]
+        self.lineages = OrderedDict()  # lineage: the worker its builds go to
+        self.max_jobs = max_jobs
+        self.cache = cache
+        self.jobs = OrderedDict()
+        self.building = {}  # cache_key, or the file export() is writing: the Build for it
+        self.running = {}  # job_id: the Build it started
+        self.lock = threading.Lock()
+
+        self.listener = threading.Thread(target=self.listen)
+        self.listener.daemon = True
+        self.listener.start()
+
+    def listen(self):
+        """Add the layers the workers report to their Build, until close() sends None.
+        """
+        while True:
+            message = self.progress.get()
+            if message is None:
+                break
+
+            build_id, event = message
+            with self.lock:
+                build = self.running.get(build_id)
+            if build is not None:
+                build.layers.append(event)
+
+    def submit(self, layout, formats=None, directory='static/exports', cache_key=None, lineage=None):
+        """Queue a layout to be built. Returns the job id.
+
+        cache_key: The hash the build is cached under. The layout's name has
+        to match it. When the cache already has it the job is finished right
+        away.
+
+        lineage: Passed on to build_layout(). Every build of a lineage is
+        sent to the same worker, so it can reuse the last one.
+
+        When a build for cache_key is already running the new job follows it,
+        and finishes with the same result.
+        """
+        job_id = uuid.uuid4().hex
+        cached = self.cache.get(cache_key) if self.cache and cache_key else None
+
+        with self.lock:
+            self.forget_finished()
+            building = self.building.get(cache_key) if cache_key else None
+            if not cached and building is None and self.cache and cache_key:
+                # The build may have finished since we looked, it's cached before it's ready()
+                cached = self.cache.get(cache_key)
+
+            if cached:
+                self.jobs[job_id] = FinishedJob(cached)
+            elif building is not None:
+                log.debug('Job %s follows the build already running for %s', job_id, cache_key)
+                self.jobs[job_id] = building
+            elif self.cache and cache_key:
+                def cache_result(result):
+                    # An exception here would stop the pool from handing back results
+                    try:
+                        self.cache.put(cache_key, result, self.in_use())
+                    except Exception:
+                        log.exception('Could not cache the build for %s', cache_key)
+
+                worker = self.worker_for(lineage)
+                self.jobs[job_id] = Build(self.workers[worker].apply_async(run_job, (layout, formats, directory, lineage, job_id), callback=cache_result), worker)
+            else:
+                worker = self.worker_for(lineage)
+                self.jobs[job_id] = Build(self.workers[worker].apply_async(run_job, (layout, formats, directory, lineage, job_id)), worker)
+
+            if building is None and not cached:
+                self.running[job_id] = self.jobs[job_id]
+                if cache_key:
+                    self.building[cache_key] = self.jobs[job_id]
+            self.forget_oldest()
+        log.debug('Submitted job %s', job_id)
+
+        return job_id
+
+    def export(self, basename, export_format, tessellation=None):
+        """Queue writing one of a finished build's lazy exports. Returns the job id.
+
+        The job's result is the `url` and `seconds` from run_export(). Asking
+        for a file that's already being written follows the job writing it.
+        """
+        job_id = uuid.uuid4().hex
+        key = '%s.%s' % (basename, export_format)
+
+        def cache_file(result):
+            # An exception here would stop the pool from handing back results
+            try:
+                self.cache.add_file(os.path.basename(os.path.dirname(basename)), result['url'])
+            except Exception:
+                log.exception('Could not add %s to the cached build', key)
+
+        with self.lock:
+            self.forget_finished()
+            if key not in self.building:
+                callback = cache_file if self.cache else None
+                worker = self.worker_for()
+                self.building[key] = Build(self.workers[worker].apply_async(run_export, (basename, export_format, tessellation), callback=callback), worker)
+            self.jobs[job_id] = self.building[key]
+            self.forget_oldest()
+        log.debug('Submitted export job %s for %s', job_id, key)
+
+        return job_id
+
+    def in_use(self):
+        """Returns the hashes of the builds that are being built or exported right now.
+        """
+        hashes = set()
+        with self.lock:
+            for key in self.building:
+                # Exports are tracked by their file, which is in the build's directory
+                hashes.add(os.path.basename(os.path.dirname(key)) if os.path.dirname(key) else key)
+
+        return hashes
+
+    def worker_for(self, lineage=None):
+        """Returns the number of the worker to send a job to. Call with self.lock held.
+        """
+        if lineage in self.lineages:
+            worker = self.lineages.pop(lineage)
+        else:
+            busy = [0] * len(self.workers)
+            for job in set(self.running.values()) | set(self.building.values()):
+                if job.worker is not None and not job.ready():
+                    busy[job.worker] += 1
+            worker = busy.index(min(busy))
+
+        if lineage:
+            # Workers only remember MAX_LINEAGES each, so there's no point keeping more
+            self.lineages[lineage] = worker
+            while len(self.lineages) > MAX_LINEAGES * len(self.workers):
+                self.lineages.popitem(last=False)
+
+        return worker
+
+    def forget_finished(self):
+        """Stop tracking the builds that are done. Call with self.lock held.
+        """
+        for key in [key for key, job in self.building.items() if job.ready()]:
+            del self.building[key]
+        for key in [key for key, job in self.running.items() if job.ready()]:
+            del self.running[key]
+
+    def forget_oldest(self):
+        """Forget the oldest finished jobs once there are more than max_jobs. Call with self.lock held.
+
+        Jobs that are still running are kept, so someone waiting on one can
+        always get its result.
+        """
+        extra = len(self.jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.ready()][:max(extra, 0)]:
+            del self.jobs[job_id]
+
+    def status(self, job_id):
+        """Returns a dictionary describing a job, or None for unknown jobs.
+
+        `status` is one of `pending`, `finished` or `failed`. Finished jobs
+        include the `result` of `build_layout()`, failed jobs an `error`.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        return self.job_status(job_id, job)
+
+    def job_status(self, job_id, job):
+        """Returns the dictionary status() describes for a job.
+        """
+        if not job.ready():
+            return {'id': job_id, 'status': 'pending'}
+
+        try:
+            return {'id': job_id, 'status': 'finished', 'result': job.get()}
+        except BuildError as e:
+            return {'id': job_id, 'status': 'failed', 'error': str(e)}
+
+    def wait(self, job_id, timeout=None):
+        """Wait for a job to finish, then return its status.
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.wait(timeout)
+
+        return self.status(job_id)
+
+    def events(self, job_id, interval=0.5):
+        """Yields (event, data) pairs as a job is built.
+
+        A `layer` event is sent for each layer as soon as it's exported. The
+        data is the same dictionary build_layout() passes to progress. Once the
+        job is done any layers that weren't reported are sent, followed by a
+        `finished` or `failed` event with the job's status.
+
+        Nothing is yielded for unknown jobs.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+
+        sent = []
+        while True:
+            job.wait(interval)
+            ready = job.ready()
+            for event in job.layers[len(sent):]:
+                sent.append(event['layer'])
+                yield 'layer', event
+            if ready:
+                break
+
+        status = self.job_status(job_id, job)
+        if status['status'] == 'finished':
+            result = status['result']
+            for layer in result['plates']:
+                if layer not in sent and layer in result['exports']:
+                    yield 'layer', {'layer': layer, 'exports': result['exports'][layer], 'width': result['width'], 'height': result['height']}
+
+        yield status['status'], status
+
+    def close(self):
+        """Let the queued jobs finish and stop the workers.
+        """
+        for worker in self.workers:
+            worker.close()
+        for worker in self.workers:
+            worker.join()
+        self.progress.put(None)
+        self.listener.join()
@@ -0,0 +1,633 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Every layer we draw is a flat plate: an outline with holes cut all the way
+# through it. For DXF and SVG output we don't need a solid at all, so this
+# module keeps a layer as a list of 2D contours instead.
+#
+# * A contour is a closed list of (x, y, bulge) vertices. The bulge describes
+#   the segment from a vertex to the next one: 0 is a straight line, anything
+#   else is an arc with bulge = tan(angle/4), positive for counterclockwise.
+#   This is the same convention DXF uses for polylines.
+# * Plate2D mimics the part of the cadquery Workplane API that KeyboardCase
+#   draws with. Like the workplane, `center()` moves a shared origin around
+#   and drawing happens relative to that origin.
+# * shape_contours() reads the same contours off a finished cadquery plate,
+#   so both backends share the writers in exporters.py.
+# * Drawing happens on the bottom face of the plate, which has its y axis
+#   flipped compared to the world coordinates. `contours()` flips it back.
+# * union_polygons() merges overlapping cutouts, like a switch and its
+#   stabilizer, into a single hole so no contour crosses another.
+# * subtract_polygon() cuts a notch into the outline for holes that cross
+#   or touch it, like the USB cutout, the way cadquery would.
+import math
+
+from .spatial import cluster_bounds, points_bounds
+
+QUARTER_BULGE = math.tan(math.pi / 8)  # bulge for a 90 degree arc
+
+
+def polygon_contour(points, origin=(0, 0)):
+    """Returns a contour for a list of points, offset by origin.
+
+    The closing point is dropped if the polyline repeats its first point.
+    """
+    points = list(points)
+    if len(points) > 1 and points[0] == points[-1]:
+        points = points[:-1]
+
+    return [(x + origin[0], y + origin[1], 0) for x, y in points]
+
+
+def circle_contour(radius, origin=(0, 0)):
+    """Returns a contour for a circle centered on origin.
+    """
+    x, y = origin
+
+    return [(x - radius, y, 1), (x + radius, y, 1)]
+
+
+def rect_contour(width, height, origin=(0, 0)):
+    """Returns a contour for a rectangle centered on origin.
+    """
+    w = width / 2.0
+    h = height / 2.0
+
+    return polygon_contour([(w, -h), (w, h), (-w, h), (-w, -h)], origin)
+
+
+def outline_contour(width, height, corners=0, corner_type=None):
+    """Returns the outline of a plate centered on (0, 0).
+
+    corners: The radius (round) or leg length (bevel) of the corners
+
+    corner_type: `round`, `bevel`, or None for square corners
+    """
+    w = width / 2.0
+    h = height / 2.0
+    c = corners
+
+    if c <= 0 or corner_type not in ('round', 'bevel'):
+        return rect_contour(width, height)
+
+    bulge = QUARTER_BULGE if corner_type == 'round' else 0
+
+    return [
+        (w, -h + c, 0), (w, h - c, bulge),
+        (w - c, h, 0), (-w + c, h, bulge),
+        (-w, h - c, 0), (-w, -h + c, bulge),
+        (-w + c, -h, 0), (w - c, -h, bulge)
+    ]
+
+
+def mirror_contour(contour):
+    """Mirror a contour across the x axis.
+
+    Mirroring reverses the direction of every arc, so the bulges flip sign.
+    """
+    return [(x, -y, -bulge if bulge else 0) for x, y, bulge in contour]
+
+
+def arc_center(start, end, bulge):
+    """Returns the (center, radius) of the arc between two vertices.
+    """
+    x1, y1 = start[0], start[1]
+    x2, y2 = end[0], end[1]
+    dx = x2 - x1
+    dy = y2 - y1
+    offset = (1 - bulge * bulge) / (4 * bulge)
+    center = ((x1 + x2) / 2.0 - dy * offset, (y1 + y2) / 2.0 + dx * offset)
+    radius = math.hypot(dx, dy) * (1 + bulge * bulge) / (4 * abs(bulge))
+
+    return center, radius
+
+
+def shape_contours(shape, tolerance=1e-6):
+    """Returns contours for the top face of a FreeCAD solid, in world coordinates.
+
+    Only the shape's attributes are used, so this doesn't import FreeCAD.
+    Lines and arcs are kept as they are, any other curve is broken up into
+    short lines.
+    """
+    top = max(face.CenterOfMass.z for face in shape.Faces)
+    contours = []
+    for face in shape.Faces:
+        if abs(face.CenterOfMass.z - top) < tolerance:
+            contours.extend(wire_contour(wire, tolerance) for wire in face.Wires)
+
+    return contours
+
+
+def wire_contour(wire, tolerance=1e-6):
+    """Returns the contour for a closed FreeCAD wire.
+    """
+    edges = wire.OrderedEdges
+    if len(edges) == 1 and hasattr(edges[0].Curve, 'Radius'):
+        center = edges[0].Curve.Center
+        return circle_contour(edges[0].Curve.Radius, (center.x, center.y))
+
+    contour = []
+    for edge, vertex in zip(edges, wire.OrderedVertexes):
+        start = vertex.Point
+        forward = (edge.valueAt(edge.FirstParameter) - start).Length < tolerance
+        if hasattr(edge.Curve, 'Radius'):
+            # The parameter of a circle is its angle, counterclockwise around the axis
+            bulge = math.tan((edge.LastParameter - edge.FirstParameter) / 4)
+            counterclockwise = (edge.Curve.Axis.z > 0) == forward
+            contour.append((start.x, start.y, bulge if counterclockwise else -bulge))
+        elif len(edge.Vertexes) == 2 and abs(edge.Length - (edge.Vertexes[1].Point - edge.Vertexes[0].Point).Length) < tolerance:
+            contour.append((start.x, start.y, 0))
+        else:
+            points = edge.discretize(Deflection=0.01)
+            if not forward:
+                points.reverse()
+            contour.extend((point.x, point.y, 0) for point in points[:-1])
+
+    return contour
+
+
+def contour_bounds(contours):
+    """Returns (min_x, min_y, max_x, max_y) for a list of contours.
+
+    Arcs are accounted for with their full circle so the bounds never clip.
+    A plate that's been cut away completely has no contours and no size.
+    """
+    xs = []
+    ys = []
+    for contour in contours:
+        for i, vertex in enumerate(contour):
+            xs.append(vertex[0])
+            ys.append(vertex[1])
+            if vertex[2]:
+                (cx, cy), radius = arc_center(vertex, contour[(i + 1) % len(contour)], vertex[2])
+                xs.extend((cx - radius, cx + radius))
+                ys.extend((cy - radius, cy + radius))
+
+    if not xs:
+        return 0, 0, 0, 0
+
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def polygon_area(points):
+    """Returns the signed area of a polygon, positive when it's counterclockwise.
+    """
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])) / 2.0
+
+
+def segment_distance(point, start, end):
+    """Returns the distance from a point to the segment between start and end.
+    """
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    length = dx * dx + dy * dy
+    t = ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / float(length) if length else 0
+    t = min(1, max(0, t))
+
+    return math.hypot(point[0] - start[0] - t * dx, point[1] - start[1] - t * dy)
+
+
+def segment_splits(start, end, other_start, other_end, tolerance):
+    """Returns where the segment between other_start and other_end crosses or touches start to end.
+
+    The result is a list of parameters along start to end, between 0 and 1.
+    """
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    ox = other_end[0] - other_start[0]
+    oy = other_end[1] - other_start[1]
+    length = math.hypot(dx, dy)
+    cross = dx * oy - dy * ox
+    if abs(cross) > tolerance * length * math.hypot(ox, oy):
+        t = ((other_start[0] - start[0]) * oy - (other_start[1] - start[1]) * ox) / float(cross)
+        u = ((other_start[0] - start[0]) * dy - (other_start[1] - start[1]) * dx) / float(cross)
+        if -tolerance <= u * math.hypot(ox, oy) <= math.hypot(ox, oy) + tolerance:
+            return [t]
+        return []
+
+    # Parallel segments only split each other where they overlap
+    return [
+        ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / (length * length)
+        for point in (other_start, other_end)
+        if segment_distance(point, start, end) < tolerance
+    ]
+
+
+def polygon_side(point, points, tolerance):
+    """Returns 1 when a point is inside a polygon, -1 when it's outside, and the edge it's on otherwise.
+
+    Edges are returned as (start, end).
+    """
+    inside = False
+    for start, end in zip(points, points[1:] + points[:1]):
+        if segment_distance(point, start, end) < tolerance:
+            return start, end
+        if (start[1] > point[1]) != (end[1] > point[1]):
+            if point[0] < start[0] + (point[1] - start[1]) * (end[0] - start[0]) / float(end[1] - start[1]):
+                inside = not inside
+
+    return 1 if inside else -1
+
+
+def chain_pieces(pieces, tolerance):
+    """Chain (start, end, bulge) pieces into contours, matching up ends that are close enough.
+
+    Vertices in the middle of a straight edge are dropped.
+    """
+    def point_key(point):
+        return (int(round(point[0] / tolerance)), int(round(point[1] / tolerance)))
+
+    outgoing = {}
+    for piece in pieces:
+        outgoing.setdefault(point_key(piece[0]), []).append(piece)
+
+    contours = []
+    for piece in pieces:
+        if piece not in outgoing.get(point_key(piece[0]), []):
+            continue
+        contour = []
+        while piece:
+            outgoing[point_key(piece[0])].remove(piece)
+            contour.append((piece[0][0], piece[0][1], piece[2]))
+            following = outgoing.get(point_key(piece[1]))
+            piece = following[0] if following else None
+
+        contours.append([
+            vertex for k, vertex in enumerate(contour)
+            if vertex[2] or contour[k - 1][2] or segment_distance(vertex, contour[k - 1], contour[(k + 1) % len(contour)]) >= tolerance
+        ])
+
+    return contours
+
+
+def merge_polygons(polygons, tolerance):
+    """Returns the outlines of the union of a few overlapping polygons.
+
+    Every edge is split where it meets another polygon, and the pieces that
+    end up inside another polygon are dropped. Edges two polygons share are
+    kept once when they run the same way and dropped when they don't. The
+    pieces that are left are chained back into polygons. Anything enclosed
+    by the union is left out, since a cutout can't have islands.
+    """
+    polygons = [points if polygon_area(points) > 0 else points[::-1] for points in polygons]
+    pieces = []
+    for i, points in enumerate(polygons):
+        for start, end in zip(points, points[1:] + points[:1]):
+            splits = set([0, 1])
+            for j, other in enumerate(polygons):
+                if j != i:
+                    for other_start, other_end in zip(other, other[1:] + other[:1]):
+                        splits.update(t for t in segment_splits(start, end, other_start, other_end, tolerance) if 0 < t < 1)
+            splits = sorted(splits)
+            for t1, t2 in zip(splits, splits[1:]):
+                piece_start = (start[0] + (end[0] - start[0]) * t1, start[1] + (end[1] - start[1]) * t1)
+                piece_end = (start[0] + (end[0] - start[0]) * t2, start[1] + (end[1] - start[1]) * t2)
+                if math.hypot(piece_end[0] - piece_start[0], piece_end[1] - piece_start[1]) < tolerance:
+                    continue
+                middle = ((piece_start[0] + piece_end[0]) / 2.0, (piece_start[1] + piece_end[1]) / 2.0)
+                keep = True
+                for j, other in enumerate(polygons):
+                    if j == i:
+                        continue
+                    side = polygon_side(middle, other, tolerance)
+                    if side == 1:
+                        keep = False
+                    elif side != -1:
+                        same_way = (end[0] - start[0]) * (side[1][0] - side[0][0]) + (end[1] - start[1]) * (side[1][1] - side[0][1]) > 0
+                        if not same_way or j < i:
+                            keep = False
+                    if not keep:
+                        break
+                if keep:
+                    pieces.append((piece_start, piece_end, 0))
+
+    merged = []
+    for contour in chain_pieces(pieces, tolerance):
+        points = [(x, y) for x, y, bulge in contour]
+        if len(points) > 2 and polygon_area(points) > 0:
+            merged.append(points)
+
+    return merged
+
+
+def union_polygons(polygons, tolerance=1e-6):
+    """Returns a list of polygons where the ones that overlap have been merged into one.
+
+    polygons: A list of polygons, each a list of (x, y) points
+
+    Polygons are grouped with cluster_bounds(), and the ones that don't
+    overlap anything are returned as they are.
+    """
+    polygons = [list(points[:-1]) if len(points) > 1 and points[0] == points[-1] else list(points) for points in polygons]
+    polygons = [[point for k, point in enumerate(points) if point != points[k - 1]] for points in polygons]  # Drop zero length edges
+    bounds = [points_bounds(points) for points in polygons]
+    size = max([max(b[2] - b[0], b[3] - b[1]) for b in bounds] + [1])
+    union = []
+    for cluster in cluster_bounds(bounds, size):
+        if len(cluster) == 1:
+            union.append(polygons[cluster[0]])
+        else:
+            union.extend(merge_polygons([polygons[i] for i in cluster], tolerance))
+
+    return union
+
+
+def contour_edges(contour):
+    """Returns the (start, end, bulge) edges of a contour.
+    """
+    return [((x, y), (contour[(i + 1) % len(contour)][0], contour[(i + 1) % len(contour)][1]), bulge) for i, (x, y, bulge) in enumerate(contour)]
+
+
+def edge_point(edge, t):
+    """Returns the point a fraction t along an edge.
+    """
+    start, end, bulge = edge
+    if not bulge:
+        return (start[0] + (end[0] - start[0]) * t, start[1] + (end[1] - start[1]) * t)
+
+    (cx, cy), radius = arc_center(start, end, bulge)
+    angle = math.atan2(start[1] - cy, start[0] - cx) + 4 * math.atan(bulge) * t
+
+    return (cx + radius * math.cos(angle), cy + radius * math.sin(angle))
+
+
+def edge_piece(edge, t1, t2):
+    """Returns the part of an edge between the fractions t1 and t2 as a new edge.
+    """
+    start, end, bulge = edge
+    piece_start = start if t1 == 0 else edge_point(edge, t1)
+    piece_end = end if t2 == 1 else edge_point(edge, t2)
+
+    return piece_start, piece_end, math.tan(math.atan(bulge) * (t2 - t1)) if bulge else 0
+
+
+def arc_side(point, start, end, bulge):
+    """Returns how far a point is on the side of the chord the arc between start and end bulges out to.
+    """
+    chord = math.hypot(end[0] - start[0], end[1] - start[1])
+    cross = (end[0] - start[0]) * (point[1] - start[1]) - (end[1] - start[1]) * (point[0] - start[0])
+
+    return -cross / chord if bulge > 0 else cross / chord
+
+
+def line_arc_crossings(start, end, arc, tolerance):
+    """Returns the points where the segment between start and end meets an arc edge.
+    """
+    (cx, cy), radius = arc_center(*arc)
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    fx = start[0] - cx
+    fy = start[1] - cy
+    a = dx * dx + dy * dy
+    b = 2 * (fx * dx + fy * dy)
+    c = fx * fx + fy * fy - radius * radius
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return []
+
+    length = math.sqrt(a)
+    crossings = []
+    for t in set([(-b - math.sqrt(discriminant)) / (2 * a), (-b + math.sqrt(discriminant)) / (2 * a)]):
+        point = (start[0] + dx * t, start[1] + dy * t)
+        if -tolerance <= t * length <= length + tolerance and arc_side(point, *arc) > -tolerance:
+            crossings.append(point)
+
+    return crossings
+
+
+def edge_splits(edge, other, tolerance):
+    """Returns the fractions along an edge where another edge crosses or touches it.
+
+    Arcs are only checked against straight edges.
+    """
+    start, end, bulge = edge
+    if not bulge and not other[2]:
+        return segment_splits(start, end, other[0], other[1], tolerance)
+
+    if not bulge:
+        length = float((end[0] - start[0]) ** 2 + (end[1] - start[1]) ** 2)
+        return [
+            ((point[0] - start[0]) * (end[0] - start[0]) + (point[1] - start[1]) * (end[1] - start[1])) / length
+            for point in line_arc_crossings(start, end, other, tolerance)
+        ]
+
+    if not other[2]:
+        (cx, cy), radius = arc_center(start, end, bulge)
+        first = math.atan2(start[1] - cy, start[0] - cx)
+        sweep = 4 * math.atan(bulge)
+        splits = []
+        for point in line_arc_crossings(other[0], other[1], edge, tolerance):
+            angle = (math.atan2(point[1] - cy, point[0] - cx) - first) % (2 * math.pi)
+            if sweep < 0:
+                angle -= 2 * math.pi
+            splits.append(angle / sweep)
+        return splits
+
+    return []
+
+
+def contour_side(point, edges, tolerance):
+    """Returns 1 when a point is inside the contour with these edges, -1 when it's outside, and the edge it's on otherwise.
+
+    The chords of the arcs make a polygon, and the area between an arc and
+    its chord is added to or taken away from that.
+    """
+    inside = False
+    for edge in edges:
+        start, end, bulge = edge
+        if bulge:
+            (cx, cy), radius = arc_center(start, end, bulge)
+            distance = math.hypot(point[0] - cx, point[1] - cy)
+            side = arc_side(point, start, end, bulge)
+            if abs(distance - radius) < tolerance and side > -tolerance:
+                return edge
+            if distance < radius and side > 0:
+                inside = not inside
+        elif segment_distance(point, start, end) < tolerance:
+            return edge
+        if (start[1] > point[1]) != (end[1] > point[1]):
+            if point[0] < start[0] + (point[1] - start[1]) * (end[0] - start[0]) / float(end[1] - start[1]):
+                inside = not inside
+
+    return 1 if inside else -1
+
+
+def subtract_polygon(contour, points, tolerance=1e-6):
+    """Cut a polygon out of a counterclockwise contour, like an outline.
+
+    Returns (contours, holes). A polygon that's inside the contour becomes
+    a hole, one that's outside doesn't cut anything, and one that covers it
+    leaves nothing. When the polygon
+    crosses or touches the contour the edges of both are split where they
+    meet. The pieces of the contour outside the polygon and the pieces of
+    the polygon inside the contour, turned around, are chained into the
+    contours that are left.
+    """
+    hole = [(point[0], point[1], 0) for point in points]
+    points = [point[:2] for k, point in enumerate(points) if point[:2] != points[k - 1][:2]]
+    if polygon_area(points) < 0:
+        points = points[::-1]
+    edges = contour_edges(contour)
+    cutout = [(start, end, 0) for start, end in zip(points, points[1:] + points[:1])]
+
+    # Only edges near the polygon can meet it
+    min_x, min_y, max_x, max_y = points_bounds(points)
+    nearby = []
+    for edge in edges:
+        bounds = contour_bounds([[edge[0] + (edge[2],), edge[1] + (0,)]])
+        if bounds[0] <= max_x + tolerance and min_x - tolerance <= bounds[2] and bounds[1] <= max_y + tolerance and min_y - tolerance <= bounds[3]:
+            nearby.append(edge)
+    if not any(-tolerance <= t <= 1 + tolerance for piece in cutout for edge in nearby for t in edge_splits(piece, edge, tolerance)):
+        if contour_side(points[0], edges, tolerance) == 1:
+            return [contour], [hole]
+        if polygon_side(contour[0][:2], points, tolerance) == 1:
+            return [], []  # The polygon covers all of it
+        return [contour], []
+
+    pieces = []
+    for edge in edges:
+        splits = set([0, 1])
+        for piece in cutout:
+            splits.update(t for t in edge_splits(edge, piece, tolerance) if 0 < t < 1)
+        splits = sorted(splits)
+        for t1, t2 in zip(splits, splits[1:]):
+            piece = edge_piece(edge, t1, t2)
+            if math.hypot(piece[1][0] - piece[0][0], piece[1][1] - piece[0][1]) < tolerance:
+                continue
+            side = polygon_side(edge_point(edge, (t1 + t2) / 2.0), points, tolerance)
+            if side == -1:
+                pieces.append(piece)
+            elif side != 1:
+                # Keep edges the polygon only runs along from the other side
+                same_way = (piece[1][0] - piece[0][0]) * (side[1][0] - side[0][0]) + (piece[1][1] - piece[0][1]) * (side[1][1] - side[0][1]) > 0
+                if not same_way:
+                    pieces.append(piece)
+
+    for edge in cutout:
+        splits = set([0, 1])
+        for other in nearby:
+            splits.update(t for t in edge_splits(edge, other, tolerance) if 0 < t < 1)
+        splits = sorted(splits)
+        for t1, t2 in zip(splits, splits[1:]):
+            piece = edge_piece(edge, t1, t2)
+            if math.hypot(piece[1][0] - piece[0][0], piece[1][1] - piece[0][1]) < tolerance:
+                continue
+            if contour_side(edge_point(edge, (t1 + t2) / 2.0), edges, tolerance) == 1:
+                pieces.append((piece[1], piece[0], 0))
+
+    contours = []
+    holes = []
+    for chained in chain_pieces(pieces, tolerance):
+        if len(chained) > 2 or any(vertex[2] for vertex in chained):
+            if polygon_area([vertex[:2] for vertex in chained]) > 0:
+                contours.append(chained)
+            else:
+                holes.append(chained)
+
+    return contours, holes
+
+
+class Plate2D(object):
+    """A plate outline and the holes cut through it.
+    """
+    def __init__(self, width, height, corners=0, corner_type=None):
+        self.width = width
+        self.height = height
+        self.outline = outline_contour(width, height, corners, corner_type)
+        self.holes = []
+        self.pending = []
+        self.origin = (0, 0)
+
+    def copy(self):
+        """Returns a new plate with the same outline and holes, centered on the origin.
+        """
+        plate = Plate2D(self.width, self.height)
+        plate.outline = list(self.outline)
+        plate.holes = list(self.holes)
+
+        return plate
+
+    def center(self, x, y):
+        """Move the origin that we draw relative to.
+        """
+        self.origin = (self.origin[0] + x, self.origin[1] + y)
+
+        return self
+
+    def polyline(self, points):
+        """Draw a closed polygon relative to the origin.
+        """
+        self.pending.append(polygon_contour(points, self.origin))
+
+        return self
+
+    def circle(self, radius):
+        """Draw a circle at the origin.
+        """
+        self.pending.append(circle_contour(radius, self.origin))
+
+        return self
+
+    def rect(self, width, height):
+        """Draw a rectangle centered on the origin.
+        """
+        self.pending.append(rect_contour(width, height, self.origin))
+
+        return self
+
+    def hole(self, diameter):
+        """Cut a round hole at the origin right away.
+        """
+        self.holes.append(circle_contour(diameter / 2.0, self.origin))
+
+        return self
+
+    def cutThruAll(self):
+        """Cut everything drawn since the last cut out of the plate.
+        """
+        self.holes.extend(self.pending)
+        self.pending = []
+
+        return self
+
+    def contours(self):
+        """Returns the outline followed by every hole, in world coordinates.
+
+        Holes that cross or touch the outline, like the USB cutout, are cut
+        out of the outline instead, and the ones outside of it are left out.
+        If that splits the plate every part is kept, biggest first. Holes
+        with arcs are always inside the plate.
+        """
+        outlines = [self.outline]
+        holes = []
+        for hole in self.holes:
+            if any(vertex[2] for vertex in hole):
+                holes.append(hole)
+                continue
+
+            parts = []
+            for outline in outlines:
+                outline_parts, outline_holes = subtract_polygon(outline, hole)
+                parts.extend(outline_parts)
+                holes.extend(outline_holes)
+            outlines = parts
+
+        outlines.sort(key=lambda outline: -abs(polygon_area([vertex[:2] for vertex in outline])))
+
+        return [mirror_contour(contour) for contour in outlines + holes]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Find out which cutouts overlap without comparing every pair. Bounds are
+# (min_x, min_y, max_x, max_y) tuples, and the grid cells are usually one key
+# wide so each cutout only lands in a handful of them.
+import math
+
+
+def points_bounds(points, x=0, y=0):
+    """Returns the bounds of a list of (x, y) points, moved by x and y.
+    """
+    points = list(points)
+
+    return (
+        min(px for px, py in points) + x, min(py for px, py in points) + y,
+        max(px for px, py in points) + x, max(py for px, py in points) + y
+    )
+
+
+def bounds_overlap(a, b):
+    """Returns True when two bounds overlap or touch.
+    """
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class GridIndex(object):
+    """A uniform grid where each cell lists the items whose bounds reach into it.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.bounds = []
+
+    def cells_for(self, bounds):
+        """Returns the (column, row) of every cell the bounds reach into.
+        """
+        min_col = int(math.floor(bounds[0] / self.cell_size))
+        min_row = int(math.floor(bounds[1] / self.cell_size))
+        max_col = int(math.floor(bounds[2] / self.cell_size))
+        max_row = int(math.floor(bounds[3] / self.cell_size))
+
+        return [(col, row) for col in range(min_col, max_col + 1) for row in range(min_row, max_row + 1)]
+
+    def insert(self, bounds):
+        """Add an item to the index. Returns the item's number.
+        """
+        item = len(self.bounds)
+        self.bounds.append(bounds)
+        for cell in self.cells_for(bounds):
+            self.cells.setdefault(cell, []).append(item)
+
+        return item
+
+    def query(self, bounds):
+        """Returns the numbers of the items that overlap the bounds, in order.
+        """
+        items = set()
+        for cell in self.cells_for(bounds):
+            for item in self.cells.get(cell, []):
+                if bounds_overlap(bounds, self.bounds[item]):
+                    items.add(item)
+
+        return sorted(items)
+
+
+def cluster_bounds(bounds_list, cell_size):
+    """Group bounds into clusters, where every bounds overlaps at least one other in its cluster.
+
+    Bounds in different clusters never overlap.
+
+    Returns a list of clusters, each a list of indexes into bounds_list.
+    """
+    index = GridIndex(cell_size)
+    parents = []
+
+    def find(item):
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    for bounds in bounds_list:
+        overlapping = index.query(bounds)
+        item = index.insert(bounds)
+        parents.append(item)
+        for other in overlapping:
+            parents[find(other)] = item
+
+    clusters = {}
+    for item in range(len(bounds_list)):
+        clusters.setdefault(find(item), []).append(item)
+
+    return sorted(clusters.values())
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Generate KLE layouts of any size for benchmarking. Each kind of layout is a
+# list of template rows, where every key is a dictionary of KLE properties.
+# Offsets like {'x': 1} are properties of the key they're on, just like in
+# KLE. The rows are repeated, stacking copies of the board on top of each
+# other, until the layout has the requested number of keys.
+import math
+
+SWITCH_TYPES = ('mx', 'alpsmx', 'mx-open', 'mx-open-rotatable', 'alps')
+STAB_TYPES = ('cherry', 'costar', 'cherry-costar', 'alps', 'matias')
+ROTATIONS = (0, 90, 180, 270, 45, 30)
+
+# A standard 60% board
+ROWS_60 = [
+    [{}] * 13 + [{'w': 2}],
+    [{'w': 1.5}] + [{}] * 12 + [{'w': 1.5}],
+    [{'w': 1.75}] + [{}] * 11 + [{'w': 2.25}],
+    [{'w': 2.25}] + [{}] * 10 + [{'w': 2.75}],
+    [{'w': 1.25}] * 3 + [{'w': 6.25}] + [{'w': 1.25}] * 4
+]
+
+# A 60% board with a function row and navigation cluster
+ROWS_TKL = [
+    [{}, {'x': 1}, {}, {}, {}, {'x': 0.5}, {}, {}, {}, {'x': 0.5}, {}, {}, {}, {'x': 0.25}, {}, {}],
+    ROWS_60[0] + [{'x': 0.25}, {}, {}],
+    ROWS_60[1] + [{'x': 0.25}, {}, {}],
+    ROWS_60[2],
+    ROWS_60[3] + [{'x': 1.25}],
+    ROWS_60[4] + [{'x': 0.25}, {}, {}]
+]
+
+# A TKL board with a numpad
+ROWS_FULL = [
+    ROWS_TKL[0],
+    ROWS_TKL[1] + [{'x': 0.25}, {}, {}, {}],
+    ROWS_TKL[2] + [{'x': 0.25}, {}, {}, {'h': 2}],
+    ROWS_TKL[3] + [{'x': 3.5}, {}, {}],
+    ROWS_TKL[4] + [{'x': 1.25}, {}, {}, {'h': 2}],
+    ROWS_TKL[5] + [{'x': 0.25, 'w': 2}, {}]
+]
+
+# Every stabilizer size we know how to cut, plus vertical keys
+ROWS_STABS = [
+    [{'w': 2}, {'w': 2.25}, {'w': 2.75}, {'w': 3}],
+    [{'w': 6.25}, {'w': 7}],
+    [{'w': 4}, {'w': 4.5}, {'w': 5.5}],
+    [{'w': 6, '_co': 9.525}, {'w': 6.5}],
+    [{'w': 8}, {'h': 2}, {'h': 2}, {'w': 1.5, 'h': 2}]
+]
+
+
+def ortholinear_rows(keys):
+    """Returns rows for a grid of 1U keys that is roughly twice as wide as it is tall.
+    """
+    columns = max(1, int(math.ceil(math.sqrt(keys * 2))))
+
+    return [[{}] * columns]
+
+
+def rotated_rows(keys):
+    """Returns rows where the switch and stabilizer cutouts are rotated.
+    """
+    row = []
+    for i, rotation in enumerate(ROTATIONS):
+        row.append({'_r': rotation})
+        row.append({'w': 2, '_r': rotation, '_rs': ROTATIONS[(i + 1) % len(ROTATIONS)]})
+
+    return [row]
+
+
+def mixed_rows(keys):
+    """Returns rows that mix every switch and stabilizer type.
+    """
+    row = []
+    for i, switch_type in enumerate(SWITCH_TYPES):
+        stab_type = STAB_TYPES[i % len(STAB_TYPES)]
+        row.append({'_t': switch_type})
+        row.append({'w': 2, '_t': switch_type, '_s': stab_type})
+        row.append({'w': 6.25, '_t': switch_type, '_s': stab_type, '_k': 0.1})
+
+    return [row]
+
+
+LAYOUT_KINDS = {
+    'ortho': ortholinear_rows,
+    '60': lambda keys: ROWS_60,
+    'tkl': lambda keys: ROWS_TKL,
+    'full': lambda keys: ROWS_FULL,
+    'rotated': rotated_rows,
+    'mixed': mixed_rows,
+    'stabs': lambda keys: ROWS_STABS
+}
+
+
+def synthetic_layout(kind, keys):
+    """Returns a layout of the given kind with exactly `keys` keys.
+
+    The first row is an empty keyboard properties dictionary.
+    """
+    if kind not in LAYOUT_KINDS:
+        raise ValueError('Unknown layout kind %s, use one of: %s' % (kind, ', '.join(sorted(LAYOUT_KINDS))))
+
+    template = LAYOUT_KINDS[kind](keys)
+    layout = [{}]
+    remaining = keys
+    while remaining > 0:
+        for template_row in template:
+            row = []
+            for key in template_row[:remaining]:
+                if key:
+                    row.append(dict(key))  # Describes the key that follows it
+                row.append('')
+            layout.append(row)
+            remaining -= len(template_row[:remaining])
+            if remaining <= 0:
+                break
+
+    return layout
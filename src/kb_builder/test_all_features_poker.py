@@ -1,7 +1,7 @@
 """Test the basic functionality with a simple plate including every switch type.
 """
-import filecmp
 from builder import KeyboardCase, load_layout_file
+from dxf_compare import dxf_differences
 
 
 def test_all_features_poker():
@@ -24,6 +24,6 @@ def test_all_features_poker():
 
     for layer in ('reinforcing', 'switch'):
         assert layer in case.layers
-        assert filecmp.cmp('test_exports/switch_%s.dxf' % case.name, 'test_exports/switch_%s.dxf.knowngood' % case.name) == True
+        assert dxf_differences('test_exports/%s/%s_layer.dxf' % (case.name, layer), 'test_exports/%s_%s.dxf.knowngood' % (layer, case.name)) == []
 
     return True
@@ -1,7 +1,7 @@
 """Test the basic functionality with a simple plate including every switch type.
 """
-import filecmp
 from builder import KeyboardCase, load_layout_file
+from dxf_compare import dxf_differences
 
 
 def test_all_shapes():
@@ -20,7 +20,37 @@ def test_all_shapes():
     assert case.inside_width == 247.65
     assert case.inside_height == 95.25
 
-    # Make sure the DXF matches the reference DXF
-    assert filecmp.cmp('test_exports/switch_%s.dxf' % case.name, 'test_exports/switch_%s.dxf.knowngood' % case.name) == True
+    # Make sure the DXF has the same geometry as the reference DXF
+    assert dxf_differences('test_exports/%s/switch_layer.dxf' % case.name, 'test_exports/switch_%s.dxf.knowngood' % case.name) == []
+
+    return True
+
+
+def test_all_shapes_2d():
+    layout = load_layout_file('test_all_shapes.kle')
+    layout[0]['backend'] = '2d'
+    case = KeyboardCase(layout, ['dxf'])
+    case.create_switch_layer('switch')
+    case.export('switch', 'test_exports/2d')
+
+    # The 2d backend merges overlapping cutouts, so it matches the cadquery reference
+    assert dxf_differences('test_exports/2d/%s/switch_layer.dxf' % case.name, 'test_exports/switch_%s.dxf.knowngood' % case.name) == []
+
+    return True
+
+
+def test_all_shapes_batch():
+    # Cutting every key at once has to give the same plate as cutting one key at a time
+    dxfs = {}
+    for cut_mode in ('key', 'batch'):
+        layout = load_layout_file('test_all_shapes.kle')
+        layout[0]['name'] = 'test_all_shapes_%s' % cut_mode
+        layout[0]['cut_mode'] = cut_mode
+        case = KeyboardCase(layout, ['dxf'])
+        case.create_switch_layer('switch')
+        case.export('switch', 'test_exports')
+        dxfs[cut_mode] = 'test_exports/%s/switch_layer.dxf' % case.name
+
+    assert dxf_differences(dxfs['batch'], dxfs['key']) == []
 
     return True
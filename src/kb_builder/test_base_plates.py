@@ -0,0 +1,28 @@
+"""Test that layers with the same outline share a base plate.
+"""
+from builder import KeyboardCase, load_layout_file
+
+
+def test_base_plates():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_base_plates'
+    layout[0]['backend'] = '2d'
+    layout[0]['case_type'] = 'sandwich'
+    layout[0]['screw'] = {'count': 8, 'radius': 2}
+    layout[0]['layers'] = {'switch': {}, 'top': {}, 'open': {'oversize': 3}}
+    case = KeyboardCase(layout, ['dxf'])
+
+    switch = case.create_switch_layer('switch')
+    top = case.create_switch_layer('top')
+    case.create_middle_layer('open')
+
+    # The switch and top layers share a base, the oversized open layer gets its own
+    assert len(case.base_plates) == 2
+
+    # Each layer gets its own copy of the base
+    base = case.base_plates[min(case.base_plates)]
+    assert len(switch.holes) > len(base.holes)
+    assert switch.holes[:len(base.holes)] == base.holes
+    assert top.holes is not switch.holes
+
+    return True
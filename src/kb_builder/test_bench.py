@@ -0,0 +1,34 @@
+"""Test the synthetic layouts and benchmark comparisons.
+"""
+from bench import compare_results
+from builder import KeyboardCase
+from synthetic import LAYOUT_KINDS, synthetic_layout
+
+
+def test_synthetic_layouts():
+    for kind in LAYOUT_KINDS:
+        for keys in (10, 104, 250):
+            layout = synthetic_layout(kind, keys)
+            layout[0]['name'] = 'test_synthetic_layouts'
+            layout[0]['backend'] = '2d'
+            case = KeyboardCase(layout, ['dxf'])
+            assert len(case.placements) == keys
+
+    return True
+
+
+def test_compare_results():
+    baseline = {'runs': [{'kind': 'ortho', 'keys': 100, 'total': 1.0, 'stages': {'cut': 0.5, 'export_dxf': 0.2}}]}
+    results = {'runs': [
+        {'kind': 'ortho', 'keys': 100, 'total': 1.1, 'stages': {'cut': 0.8, 'export_dxf': 0.205}},
+        {'kind': 'ortho', 'keys': 500, 'total': 9.0, 'stages': {'cut': 4.0}}
+    ]}
+
+    # Only the cut stage got more than 20% slower, and runs without a baseline are skipped
+    regressions = compare_results(results, baseline, 0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('ortho with 100 keys: cut went from 0.500 to 0.800 seconds')
+
+    assert len(compare_results(results, baseline, 0.05)) == 2
+
+    return True
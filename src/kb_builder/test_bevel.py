@@ -1,7 +1,7 @@
 """Test the basic functionality with a simple plate including every switch type.
 """
-import filecmp
 from builder import KeyboardCase, load_layout_file
+from dxf_compare import dxf_differences
 
 
 def test_all_shapes():
@@ -23,7 +23,7 @@ def test_all_shapes():
     assert case.inside_width == 247.65
     assert case.inside_height == 95.25
 
-    # Make sure the DXF matches the reference DXF
-    assert filecmp.cmp('test_exports/switch_%s.dxf' % case.name, 'test_exports/switch_%s.dxf.knowngood' % case.name) == True
+    # Make sure the DXF has the same geometry as the reference DXF
+    assert dxf_differences('test_exports/%s/switch_layer.dxf' % case.name, 'test_exports/switch_%s.dxf.knowngood' % case.name) == []
 
     return True
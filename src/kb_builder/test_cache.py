@@ -0,0 +1,77 @@
+"""Test looking up and evicting cached builds.
+"""
+import os
+import shutil
+from cache import BuildCache
+
+
+def fake_build(directory, data_hash, size):
+    """Write a build with a single file of `size` bytes and return its result.
+    """
+    os.makedirs('%s/%s' % (directory, data_hash))
+    with open('%s/%s/switch_layer.dxf' % (directory, data_hash), 'w') as f:
+        f.write('0' * size)
+
+    return {
+        'formats': ['dxf'],
+        'plates': ['switch'],
+        'exports': {'switch': [{'name': 'dxf', 'url': '/%s/%s/switch_layer.dxf' % (directory, data_hash)}]}
+    }
+
+
+def test_cache():
+    directory = 'test_exports/test_cache'
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    cache = BuildCache(directory, 2500)
+
+    assert cache.get('first') is None
+    first = fake_build(directory, 'first', 800)
+    cache.put('first', first)
+    assert cache.get('first') == first
+
+    # Missing files mean the build has to be done again
+    second = fake_build(directory, 'second', 800)
+    cache.put('second', second)
+    os.remove('%s/second/switch_layer.dxf' % directory)
+    assert cache.get('second') is None
+
+    # The least recently used build goes first
+    third = fake_build(directory, 'third', 1000)
+    os.utime(cache.manifest_file('first'), (0, 0))
+    cache = BuildCache(directory, 2500)  # Reads the last use of each build from its manifest
+    cache.put('third', third)
+    assert cache.get('first') is None
+    assert not os.path.exists('%s/first' % directory)
+    assert cache.get('third') == third
+
+    # Lazy exports don't have to be there yet
+    third['exports']['switch'].append({'name': 'stp', 'url': '/%s/third/switch_layer.stp' % directory, 'lazy': True})
+    cache.put('third', third)
+    assert cache.get('third') == third
+
+    # Each manifest keeps the size of its build, lazy exports are added once they're written
+    with open('%s/third/switch_layer.stp' % directory, 'w') as f:
+        f.write('0' * 100)
+    cache.add_file('third', third['exports']['switch'][1]['url'])
+    assert dict((data_hash, size) for last_used, size, data_hash in cache.builds()) == {'second': 800, 'third': 1100}
+    assert cache.total_size == 1900
+
+    # Builds that are in use are skipped
+    os.utime(cache.manifest_file('second'), (0, 0))
+    os.utime(cache.manifest_file('third'), (1, 1))
+    cache = BuildCache(directory, 2500)
+    cache.put('fourth', fake_build(directory, 'fourth', 900), in_use=set(['second']))
+    assert os.path.exists('%s/second' % directory)
+    assert not os.path.exists('%s/third' % directory)
+    assert cache.total_size == 1700
+
+    # Exports are found in the cache, whatever url it's served under
+    fifth = fake_build(directory, 'fifth', 10)
+    fifth['exports']['switch'][0]['url'] = '/static/exports/fifth/switch_layer.dxf'
+    cache.put('fifth', fifth)
+    assert cache.get('fifth') == fifth
+
+    shutil.rmtree(directory)
+
+    return True
@@ -0,0 +1,23 @@
+"""Test that cutouts are only computed once for each distinct key shape.
+"""
+from builder import KeyboardCase, load_layout_file
+
+
+def test_cutout_templates():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_cutout_templates'
+    layout[0]['backend'] = '2d'
+    layout[0]['layers'] = {'switch': {}, 'top': {}}
+    case = KeyboardCase(layout, ['dxf'])
+    case.create_switch_layer('switch')
+
+    # 1U keys, the 2U zero key, and the two 2U tall keys
+    assert len(case.cutout_templates) == 3
+
+    # Cached templates are returned as-is
+    key = {'w': 1, 'h': 2}
+    assert case.cutout_template(key, 'switch') is case.cutout_template(dict(key), 'switch')
+    assert case.cutout_template(key, 'top') is not case.cutout_template(key, 'switch')
+    assert len(case.cutout_templates) == 4
+
+    return True
@@ -0,0 +1,44 @@
+"""Test that a new version of a layout only recuts the keys that changed.
+"""
+from builder import KeyboardCase, load_layout_file
+
+
+def test_incremental():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_incremental'
+    layout[0]['backend'] = '2d'
+    layout[0]['case_type'] = 'sandwich'
+    previous = KeyboardCase(layout, ['dxf'])
+    previous.create_layer('switch')
+
+    # Change the switch type of the first key
+    layout[1].insert(0, {'_t': 'alps'})
+    case = KeyboardCase(layout, ['dxf'])
+    plate = case.create_layer('switch', previous)
+    assert case.timings['cut_switch']['count'] == 1
+
+    # The result matches a build from scratch
+    full = KeyboardCase(layout, ['dxf'])
+    full_plate = full.create_layer('switch')
+    assert full.timings['cut_switch']['count'] == len(full.placements)
+    assert sorted(plate.holes) == sorted(full_plate.holes)
+    assert len(plate.holes) == len(full_plate.holes)
+
+    # Changing the plate itself means building from scratch
+    layout[0]['kerf'] = 0.1
+    case = KeyboardCase(layout, ['dxf'])
+    case.create_layer('switch', previous)
+    assert case.timings['cut_switch']['count'] == len(case.placements)
+
+    # So does growing every cutout, and the result matches a build from scratch
+    del layout[0]['kerf']
+    previous = KeyboardCase(layout, ['dxf'])
+    previous.create_layer('switch')
+    layout[0]['grow_x'] = 0.5
+    case = KeyboardCase(layout, ['dxf'])
+    plate = case.create_layer('switch', previous)
+    assert case.timings['cut_switch']['count'] == len(case.placements)
+    full = KeyboardCase(layout, ['dxf'])
+    assert sorted(plate.holes) == sorted(full.create_layer('switch').holes)
+
+    return True
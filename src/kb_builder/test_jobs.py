@@ -0,0 +1,244 @@
+"""Test building layouts in the worker pool.
+"""
+import filecmp
+import multiprocessing
+from builder import KeyboardCase, can_fork_pool, load_layout_file
+from cache import BuildCache
+from jobs import FinishedJob, JobQueue, build_layout
+
+
+def test_jobs():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_jobs'
+    layout[0]['backend'] = '2d'
+    layout[0]['layers'] = {'switch': {}, 'top': {}}
+
+    queue = JobQueue(2)
+    job_id = queue.submit(layout, ['dxf'], 'test_exports')
+    bad_id = queue.submit([{'layers': {'switch': {'holes': 'bad'}}}, ['']], ['dxf'], 'test_exports')
+
+    job = queue.wait(job_id)
+    assert job['status'] == 'finished'
+    assert job['result']['plates'] == ['switch', 'top']
+    exports = job['result']['exports']['switch']
+    assert [(export['name'], export['url']) for export in exports] == [('dxf', '/test_exports/test_jobs/switch_layer.dxf')]
+    assert exports[0]['seconds'] >= 0
+
+    bad_job = queue.wait(bad_id)
+    assert bad_job['status'] == 'failed'
+    assert 'Traceback' in bad_job['error']
+
+    assert queue.status('unknown') is None
+    queue.close()
+
+    # A finished build is answered from the cache
+    cache = BuildCache('test_exports', 1024*1024)
+    queue = JobQueue(1, cache=cache)
+    job = queue.wait(queue.submit(layout, ['dxf'], 'test_exports', 'test_jobs'))
+    assert job['status'] == 'finished'
+    assert cache.get('test_jobs') == job['result']
+
+    job_id = queue.submit(layout, ['dxf'], 'test_exports', 'test_jobs')
+    assert queue.status(job_id)['result'] == job['result']
+    queue.close()
+
+    return True
+
+
+def test_coalesce_jobs():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_coalesce_jobs'
+    layout[0]['backend'] = '2d'
+    layout[0]['layers'] = {'switch': {}}
+
+    # Jobs for the same build share it while it's running
+    queue = JobQueue(2)
+    job_ids = [queue.submit(layout, ['dxf'], 'test_exports', 'test_coalesce_jobs') for i in range(3)]
+    other_id = queue.submit(layout, ['dxf'], 'test_exports', 'test_coalesce_other')
+    assert queue.jobs[job_ids[0]] is queue.jobs[job_ids[1]] is queue.jobs[job_ids[2]]
+    assert queue.jobs[other_id] is not queue.jobs[job_ids[0]]
+    assert queue.in_use() == set(['test_coalesce_jobs', 'test_coalesce_other'])
+
+    jobs = [queue.wait(job_id) for job_id in job_ids]
+    assert [job['status'] for job in jobs] == ['finished'] * 3
+    assert jobs[0]['result'] == jobs[1]['result'] == jobs[2]['result']
+
+    # Once it's finished the next job is built again
+    job_id = queue.submit(layout, ['dxf'], 'test_exports', 'test_coalesce_jobs')
+    assert queue.jobs[job_id] is not queue.jobs[job_ids[0]]
+    assert queue.wait(job_id)['status'] == 'finished'
+    queue.close()
+
+    return True
+
+
+def test_export_pool():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_export_pool'
+
+    # Every layer a case exports shares the same processes, until it's closed
+    case = KeyboardCase(layout, ['stp', 'stl'])
+    pool = case.export_pool()
+    assert case.export_pool() is pool
+    case.close()
+    assert case.export_workers is None
+    assert case.export_pool() is not pool
+    case.close()
+
+    return True
+
+
+def test_can_fork_pool():
+    # Only processes outside of a pool can start one
+    pool = multiprocessing.Pool(1)
+    try:
+        assert can_fork_pool()
+        assert not pool.apply(can_fork_pool)
+    finally:
+        pool.close()
+        pool.join()
+
+    return True
+
+
+class PendingJob(object):
+    def ready(self):
+        return False
+
+
+def test_forget_oldest():
+    # Only finished jobs are forgotten, oldest first
+    queue = JobQueue(1, max_jobs=3)
+    for job_id, job in (('a', PendingJob()), ('b', FinishedJob({})), ('c', FinishedJob({})), ('d', PendingJob())):
+        queue.jobs[job_id] = job
+    with queue.lock:
+        queue.forget_oldest()
+    assert list(queue.jobs) == ['a', 'c', 'd']
+
+    # Running jobs are kept even when there are more than max_jobs
+    queue.jobs['e'] = PendingJob()
+    with queue.lock:
+        queue.forget_oldest()
+    assert list(queue.jobs) == ['a', 'd', 'e']
+
+    # Exports keep the build they're written into in use
+    queue.building['test_exports/abc/switch_layer.stp'] = queue.jobs['e']
+    assert queue.in_use() == set(['abc'])
+    queue.building.clear()
+    queue.jobs.clear()
+    queue.close()
+
+    return True
+
+
+class LateCache(BuildCache):
+    """A cache that only gets its build after the first time submit() looks.
+    """
+    def __init__(self, directory, max_size, result):
+        BuildCache.__init__(self, directory, max_size)
+        self.late = result
+
+    def get(self, data_hash):
+        if self.late is not None:
+            self.put(data_hash, self.late)
+            self.late = None
+            return None
+
+        return BuildCache.get(self, data_hash)
+
+
+def test_cache_recheck():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_cache_recheck'
+    layout[0]['backend'] = '2d'
+    layout[0]['layers'] = {'switch': {}}
+    result = build_layout(layout, ['dxf'], 'test_exports')
+
+    # A build that finished while the job was being submitted isn't built again
+    queue = JobQueue(1, cache=LateCache('test_exports', 1024*1024, result))
+    job_id = queue.submit(layout, ['dxf'], 'test_exports', 'test_cache_recheck')
+    assert isinstance(queue.jobs[job_id], FinishedJob)
+    assert queue.status(job_id)['result'] == result
+    queue.close()
+
+    return True
+
+
+def test_lineage_jobs():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_lineage_jobs'
+    layout[0]['backend'] = '2d'
+    layout[0]['layers'] = {'switch': {}}
+
+    # Every build of a lineage goes to the same worker, so only the changed key is recut
+    queue = JobQueue(3)
+    first_id = queue.submit(layout, ['dxf'], 'test_exports', lineage='test_lineage_jobs')
+    others = [queue.submit(layout, ['dxf'], 'test_exports') for i in range(3)]
+    assert queue.wait(first_id)['status'] == 'finished'
+    layout[1].insert(0, {'_t': 'alps'})
+    job_id = queue.submit(layout, ['dxf'], 'test_exports', lineage='test_lineage_jobs')
+    assert queue.jobs[job_id].worker == queue.jobs[first_id].worker
+    assert queue.wait(job_id)['result']['timings']['cut_switch']['count'] == 1
+    for other_id in others:
+        queue.wait(other_id)
+    queue.close()
+
+    return True
+
+
+def test_job_events():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_job_events'
+    layout[0]['backend'] = '2d'
+    layout[0]['layers'] = {'switch': {}, 'top': {}}
+
+    # Each layer is sent once, then the result
+    queue = JobQueue(1)
+    job_id = queue.submit(layout, ['dxf'], 'test_exports')
+    events = list(queue.events(job_id))
+    assert [event for event, data in events] == ['layer', 'layer', 'finished']
+    assert sorted(data['layer'] for event, data in events[:2]) == ['switch', 'top']
+
+    result = events[-1][1]['result']
+    for event, data in events[:2]:
+        assert data['exports'] == result['exports'][data['layer']]
+        assert data['width'] == result['width']
+
+    bad_id = queue.submit([{'layers': {'switch': {'holes': 'bad'}}}, ['']], ['dxf'], 'test_exports')
+    assert [event for event, data in queue.events(bad_id)] == ['failed']
+    assert list(queue.events('unknown')) == []
+    queue.close()
+
+    return True
+
+
+def test_lazy_formats():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_lazy_formats'
+    layout[0]['backend'] = '2d'
+    layout[0]['layers'] = {'switch': {}}
+    layout[0]['lazy_formats'] = ['svg', 'bogus']
+
+    # The 2d backend is quick enough to write its lazy formats right away
+    exports = build_layout(layout, ['dxf'], 'test_exports')['exports']['switch']
+    assert [export['name'] for export in exports] == ['dxf', 'svg']
+    assert not [export for export in exports if export.get('lazy')]
+
+    return True
+
+
+def test_parallel_layers():
+    exports = {}
+    for name, processes in (('test_serial_layers', 1), ('test_parallel_layers', 3)):
+        layout = load_layout_file('test_numpad.kle')
+        layout[0]['name'] = name
+        layout[0]['backend'] = '2d'
+        layout[0]['layers'] = {'bottom': {}, 'closed': {}, 'switch': {}, 'top': {}}
+        exports[name] = build_layout(layout, ['dxf'], 'test_exports', processes)['exports']
+
+    # Every layer is exported, and matches the layer built in a single process
+    assert sorted(exports['test_parallel_layers']) == ['bottom', 'closed', 'switch', 'top']
+    for layer in exports['test_parallel_layers']:
+        assert filecmp.cmp('test_exports/test_serial_layers/%s_layer.dxf' % layer, 'test_exports/test_parallel_layers/%s_layer.dxf' % layer) == True
+
+    return True
@@ -0,0 +1,53 @@
+"""Test that parsing layouts and the 2d backend don't load FreeCAD.
+"""
+import subprocess
+import sys
+
+SCRIPT = """
+import sys
+sys.path.insert(0, 'src')
+from kb_builder.builder import KeyboardCase, load_layout_file
+
+layout = load_layout_file('test_numpad.kle')
+layout[0]['name'] = 'test_lazy_imports'
+layout[0]['backend'] = '2d'
+case = KeyboardCase(layout, ['dxf'])
+case.create_layer('switch')
+case.export('switch', 'test_exports')
+
+print('%s %s' % (case.width, case.height))
+print(' '.join(sorted(name for name in ('FreeCAD', 'Part', 'cadquery', 'importDXF', 'importSVG', 'Mesh') if name in sys.modules)))
+"""
+
+
+def test_lazy_imports():
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT]).decode('utf-8').split('\n')
+
+    assert output[0] == '76.2 95.25'
+    assert output[1] == ''
+
+    return True
+
+
+QUEUE_SCRIPT = """
+import sys
+sys.path.insert(0, 'src')
+sys.modules['cadquery'] = None  # Importing it raises ImportError
+from kb_builder.builder import load_layout_file
+from kb_builder.jobs import JobQueue
+
+layout = load_layout_file('test_numpad.kle')
+layout[0]['name'] = 'test_lazy_imports_queue'
+layout[0]['backend'] = '2d'
+queue = JobQueue(1)
+print(queue.wait(queue.submit(layout, ['dxf'], 'test_exports'))['status'])
+queue.close()
+"""
+
+
+def test_job_queue_without_cadquery():
+    output = subprocess.check_output([sys.executable, '-c', QUEUE_SCRIPT]).decode('utf-8').split('\n')
+
+    assert output[0] == 'finished'
+
+    return True
@@ -0,0 +1,21 @@
+"""Test that keys are placed at the right absolute positions.
+"""
+from builder import KeyboardCase, load_layout_file
+
+
+def test_placement():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_placement'
+    case = KeyboardCase(layout, ['dxf'])
+
+    placements = [(round(p.x, 3), round(p.y, 3), p.rotation) for p in case.placements]
+
+    assert len(placements) == 17
+    assert placements[0] == (-28.575, -38.1, 0)     # NumLock
+    assert placements[7] == (28.575, -9.525, 90)    # plus
+    assert placements[14] == (28.575, 28.575, 90)   # Enter
+    assert placements[15] == (-19.05, 38.1, 0)      # 0
+    assert placements[16] == (9.525, 38.1, 0)       # dot
+    assert case.placements[7].key['h'] == 2
+
+    return True
@@ -0,0 +1,251 @@
+"""Test the 2D plate representation and the DXF/SVG/outline writers.
+"""
+import math
+from dxf_compare import dxf_differences, read_dxf
+from exporters import read_outline, write_dxf, write_outline, write_svg
+from plate2d import Plate2D, polygon_area, shape_contours, union_polygons
+
+
+def test_plate2d_contours():
+    plate = Plate2D(20, 10)
+    plate.center(-5, -2).polyline([(0,0), (2,0), (2,1), (0,0)]).center(5, 2)
+    plate.circle(1).cutThruAll()
+    plate.hole(4)
+
+    contours = plate.contours()
+
+    # The outline comes first, then holes in the order they were cut
+    assert len(contours) == 4
+    assert contours[0] == [(10, 5, 0), (10, -5, 0), (-10, -5, 0), (-10, 5, 0)]
+    assert contours[1] == [(-5, 2, 0), (-3, 2, 0), (-3, 1, 0)]
+    assert contours[2] == [(-1, 0, -1), (1, 0, -1)]
+    assert contours[3] == [(-2, 0, -1), (2, 0, -1)]
+
+    return True
+
+
+def test_plate2d_corners():
+    round_plate = Plate2D(20, 10, 2, 'round')
+    bevel_plate = Plate2D(20, 10, 2, 'bevel')
+
+    assert len(round_plate.outline) == 8
+    assert len([v for v in round_plate.outline if v[2]]) == 4
+    assert [v[:2] for v in round_plate.outline] == [v[:2] for v in bevel_plate.outline]
+    assert not [v for v in bevel_plate.outline if v[2]]
+
+    return True
+
+
+def test_plate2d_notches():
+    # A cutout that touches the outline cuts a notch into it
+    plate = Plate2D(20, 10, 2, 'round')
+    plate.polyline([(-3, -5), (3, -5), (2, -3), (-2, -3)]).cutThruAll()
+    contours = plate.contours()
+    assert len(contours) == 1
+    assert set([(-3, 5), (-2, 3), (2, 3), (3, 5)]) <= set(v[:2] for v in contours[0])
+    assert len([v for v in contours[0] if v[2]]) == 4
+
+    # Cutting across a round corner keeps the rest of its arc
+    plate = Plate2D(20, 10, 2, 'round')
+    plate.polyline([(9, 3), (12, 3), (12, 6), (9, 6)]).cutThruAll()
+    arcs = [v[2] for v in plate.contours()[0] if v[2]]
+    assert len(arcs) == 4
+    assert abs(min(abs(bulge) for bulge in arcs) - math.tan(math.pi / 24)) < 1e-9
+
+    # Cutouts outside the plate don't cut anything, and a plate cut in two keeps both halves
+    plate = Plate2D(20, 10)
+    plate.polyline([(20, 0), (22, 0), (22, 2)]).polyline([(5, 0), (6, 0), (6, 1)]).cutThruAll()
+    assert len(plate.contours()) == 2
+    plate.rect(2, 12).cutThruAll()
+    contours = plate.contours()
+    assert len(contours) == 3
+    assert [abs(polygon_area([v[:2] for v in contour])) for contour in contours[:2]] == [90, 90]
+
+    return True
+
+
+def test_plate2d_export():
+    plate = Plate2D(20, 10, 2, 'round')
+    plate.polyline([(0,0), (2,0), (2,1), (0,0)]).circle(1).cutThruAll()
+
+    write_dxf(plate.contours(), 'test_exports/test_plate2d.dxf')
+    dxf = open('test_exports/test_plate2d.dxf').read().split('\n')
+    assert 'AC1009' in dxf and 'INSUNITS' not in dxf
+    assert dxf.count('POLYLINE') == dxf.count('SEQEND') == 2
+    assert dxf.count('VERTEX') == 11
+    assert dxf.count(' 42') == 4
+    assert dxf.count('CIRCLE') == 1
+
+    write_svg(plate.contours(), 'test_exports/test_plate2d.svg')
+    svg = open('test_exports/test_plate2d.svg').read()
+    assert 'width="20.0mm" height="10.0mm"' in svg
+    assert svg.count('<path') == 3
+
+    return True
+
+
+def write_exploded_dxf(filename, entities):
+    """Write a DXF like FreeCAD's, with each edge as its own LINE or ARC.
+    """
+    with open(filename, 'w') as dxf:
+        dxf.write('  0\nSECTION\n  2\nENTITIES\n')
+        for entity, values in entities:
+            dxf.write('  0\n%s\n  8\n0\n' % entity)
+            for code, value in values:
+                dxf.write('%3d\n%s\n' % (code, value))
+        dxf.write('  0\nENDSEC\n  0\nEOF\n')
+
+
+def test_dxf_differences():
+    plate = Plate2D(20, 10, 2, 'round')
+    plate.circle(1).cutThruAll()
+    write_dxf(plate.contours(), 'test_exports/test_dxf_differences.dxf')
+    assert len(read_dxf('test_exports/test_dxf_differences.dxf')) == 9
+
+    # The same plate, with the long edges split in two and the circle as two arcs
+    entities = [
+        ('ARC', [(10, 0), (20, 0), (40, 1), (50, 0), (51, 180)]),
+        ('ARC', [(10, 0), (20, 0), (40, 1), (50, 180), (51, 360)]),
+        ('LINE', [(10, -8), (20, 5), (11, 0), (21, 5)]),
+        ('LINE', [(10, 0), (20, 5), (11, 8), (21, 5)]),
+        ('LINE', [(10, -8), (20, -5), (11, 8), (21, -5)]),
+        ('LINE', [(10, 10), (20, -3), (11, 10), (21, 3)]),
+        ('LINE', [(10, -10), (20, -3), (11, -10), (21, 3)])
+    ]
+    for cx, cy, start in ((8, 3, 0), (-8, 3, 90), (-8, -3, 180), (8, -3, 270)):
+        entities.append(('ARC', [(10, cx), (20, cy), (40, 2), (50, start), (51, start + 90)]))
+    write_exploded_dxf('test_exports/test_dxf_differences.dxf.exploded', entities)
+    assert dxf_differences('test_exports/test_dxf_differences.dxf', 'test_exports/test_dxf_differences.dxf.exploded') == []
+
+    # A line that moved shows up on both sides
+    entities[2] = ('LINE', [(10, -8), (20, 5.1), (11, 0), (21, 5.1)])
+    write_exploded_dxf('test_exports/test_dxf_differences.dxf.exploded', entities)
+    assert len(dxf_differences('test_exports/test_dxf_differences.dxf', 'test_exports/test_dxf_differences.dxf.exploded')) == 3
+
+    return True
+
+
+def test_union_polygons():
+    apart = [(10, 10), (11, 10), (11, 11), (10, 11)]
+    polygons = union_polygons([[(0, 0), (2, 0), (2, 2), (0, 2)], [(1, 1), (1, 3), (3, 3), (3, 1)], apart])
+
+    # The overlapping squares become one, the other one is left alone
+    assert len(polygons) == 2
+    assert apart in polygons
+    merged = [points for points in polygons if points != apart][0]
+    assert len(merged) == 8
+    assert polygon_area(merged) == 7
+
+    # Edges the polygons share don't end up inside the union
+    polygons = union_polygons([[(0, 0), (2, 0), (2, 2), (0, 2)], [(2, 0), (4, 0), (4, 2), (2, 2)]])
+    assert len(polygons) == 1
+    assert sorted(polygons[0]) == [(0, 0), (0, 2), (4, 0), (4, 2)]
+
+    return True
+
+
+def test_plate2d_outline():
+    plate = Plate2D(20.0004, 10, 2, 'round')
+    plate.polyline([(0,0), (2,0), (2,1), (0,0)]).circle(1).cutThruAll()
+    contours = plate.contours()
+
+    # Coordinates come back to the nearest micron
+    write_outline(contours, 'test_exports/test_plate2d.outline', 3)
+    thickness, outline = read_outline('test_exports/test_plate2d.outline')
+    assert thickness == 3
+    assert len(outline) == len(contours)
+    for contour, outline_contour in zip(contours, outline):
+        assert len(contour) == len(outline_contour)
+        for vertex, outline_vertex in zip(contour, outline_contour):
+            assert max(abs(a - b) for a, b in zip(vertex, outline_vertex)) < 0.0005
+
+    assert outline[0][0][0] == 10.0
+    assert outline[2] == [(-1, 0, -1), (1, 0, -1)]
+
+    return True
+
+
+class Vector(object):
+    def __init__(self, x, y, z=0):
+        self.x, self.y, self.z = x, y, z
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    @property
+    def Length(self):
+        return math.sqrt(self.x**2 + self.y**2 + self.z**2)
+
+
+class Vertex(object):
+    def __init__(self, x, y):
+        self.Point = Vector(x, y)
+
+
+class Line(object):
+    pass
+
+
+class Circle(object):
+    def __init__(self, center, radius, axis_z=1):
+        self.Center = center
+        self.Radius = radius
+        self.Axis = Vector(0, 0, axis_z)
+
+
+class Edge(object):
+    def __init__(self, start, end, curve=None, first=0, last=1):
+        self.Vertexes = [start, end]
+        self.Curve = curve or Line()
+        self.FirstParameter = first
+        self.LastParameter = last
+        if curve:
+            self.Length = curve.Radius * (last - first)
+        else:
+            self.Length = (end.Point - start.Point).Length
+
+    def valueAt(self, parameter):
+        if isinstance(self.Curve, Line):
+            return self.Vertexes[0].Point if parameter == self.FirstParameter else self.Vertexes[1].Point
+        center, radius = self.Curve.Center, self.Curve.Radius
+        return Vector(center.x + radius * math.cos(parameter), center.y + radius * math.sin(parameter))
+
+
+class Wire(object):
+    def __init__(self, edges, vertexes):
+        self.OrderedEdges = edges
+        self.OrderedVertexes = vertexes
+
+
+class Face(object):
+    def __init__(self, z, wires):
+        self.CenterOfMass = Vector(0, 0, z)
+        self.Wires = wires
+
+
+class Shape(object):
+    def __init__(self, faces):
+        self.Faces = faces
+
+
+def test_shape_contours():
+    # A 10x10 square with a rounded corner at the top right and a round hole
+    a, b, c, d, e = Vertex(-5, -5), Vertex(5, -5), Vertex(5, 3), Vertex(3, 5), Vertex(-5, 5)
+    outline = Wire([
+        Edge(a, b),
+        Edge(b, c),
+        Edge(c, d, Circle(Vector(3, 3), 2), 0, math.pi / 2),
+        Edge(e, d),  # Runs backwards
+        Edge(e, a)
+    ], [a, b, c, d, e])
+    hole = Wire([Edge(Vertex(1, 0), Vertex(1, 0), Circle(Vector(0, 0), 1), 0, 2 * math.pi)], [Vertex(1, 0)])
+    shape = Shape([Face(1.5, [outline, hole]), Face(-1.5, [outline]), Face(0, [])])
+
+    contours = shape_contours(shape)
+    assert len(contours) == 2
+    assert [vertex[:2] for vertex in contours[0]] == [(-5, -5), (5, -5), (5, 3), (3, 5), (-5, 5)]
+    assert abs(contours[0][2][2] - math.tan(math.pi / 8)) < 1e-9
+    assert [vertex[2] for vertex in contours[0][:2] + contours[0][3:]] == [0, 0, 0, 0]
+    assert contours[1] == [(-1, 0, 1), (1, 0, 1)]
+
+    return True
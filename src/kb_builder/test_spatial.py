@@ -0,0 +1,40 @@
+"""Test the spatial index used to cluster cutouts.
+"""
+from builder import KeyboardCase, load_layout_file
+from spatial import GridIndex, cluster_bounds
+
+
+def test_grid_index():
+    index = GridIndex(10)
+    index.insert((0, 0, 5, 5))
+    index.insert((4, 4, 12, 12))
+    index.insert((30, 30, 35, 35))
+    index.insert((-5, -5, -1, -1))
+
+    assert index.query((1, 1, 2, 2)) == [0]
+    assert index.query((5, 5, 6, 6)) == [0, 1]
+    assert index.query((-20, -20, 40, 40)) == [0, 1, 2, 3]
+    assert index.query((13, 13, 29, 29)) == []
+
+    # Overlapping bounds end up in the same cluster, even when chained
+    bounds = [(0, 0, 5, 5), (30, 30, 35, 35), (4, 4, 12, 12), (11, 0, 20, 5), (100, 0, 101, 1)]
+    assert cluster_bounds(bounds, 10) == [[0, 2, 3], [1], [4]]
+
+    return True
+
+
+def test_cutout_clusters():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_cutout_clusters'
+    layout[0]['stabilizer'] = 'cherry'
+    case = KeyboardCase(layout, ['dxf'])
+    cutouts = [case.key_cutout(placement, 'switch') for placement in case.placements]
+
+    # Each key is a cluster of its switch and stabilizer cutouts
+    clusters = case.cutout_clusters(cutouts)
+    assert len(clusters) == len(case.placements)
+    for cluster in clusters:
+        assert len(set(cutout for cutout, polylines in cluster)) == 1
+    assert max(len(cluster) for cluster in clusters) > 1
+
+    return True
@@ -0,0 +1,37 @@
+"""Test the tessellation settings for meshed exports.
+"""
+import json
+from builder import TESSELLATION_PRESETS, KeyboardCase, load_layout_file
+
+
+def test_tessellation():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_tessellation'
+    layout[0]['backend'] = '2d'
+
+    # Previews are coarse and STL files are fine unless we say otherwise
+    case = KeyboardCase(layout, ['outline'])
+    assert case.tessellation['js'] == case.tessellation['outline'] == TESSELLATION_PRESETS['coarse']
+    assert case.tessellation['stl'] == TESSELLATION_PRESETS['fine']
+
+    layout[0]['tessellation'] = 'fine'
+    case = KeyboardCase(layout, ['outline'])
+    assert case.tessellation['js'] == case.tessellation['outline'] == TESSELLATION_PRESETS['fine']
+
+    # Settings for one format, with bad ones ignored
+    layout[0]['tessellation'] = {'stl': {'linear_deflection': 0.05}, 'outline': 'bogus', 'dxf': 'fine', 'js': {'angular_deflection': -1}}
+    case = KeyboardCase(layout, ['outline'])
+    assert case.tessellation['stl'] == (0.05, TESSELLATION_PRESETS['fine'][1])
+    assert case.tessellation['outline'] == case.tessellation['js'] == TESSELLATION_PRESETS['coarse']
+    assert 'dxf' not in case.tessellation
+
+    # The preview is told how closely to follow the arcs
+    layout[0]['tessellation'] = {'outline': {'linear_deflection': 0.2, 'angular_deflection': 0.3}}
+    layout[0]['layers'] = {'switch': {}}
+    case = KeyboardCase(layout, ['outline'])
+    case.create_layer('switch')
+    case.export('switch', 'test_exports')
+    outline = json.load(open('test_exports/test_tessellation/switch_layer.outline'))
+    assert outline['tessellation'] == [0.2, 0.3]
+
+    return True
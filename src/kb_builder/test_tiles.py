@@ -0,0 +1,60 @@
+"""Test cutting the switch layer in bands.
+"""
+from builder import KeyboardCase, load_layout_file
+from plate2d import shape_contours
+
+
+def rounded(holes):
+    # The plate's origin is moved from key to key, so the last digits can differ
+    return sorted([tuple(round(value, 6) for value in vertex) for vertex in hole] for hole in holes)
+
+
+def test_tiles():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_tiles'
+    layout[0]['backend'] = '2d'
+    full = KeyboardCase(layout, ['dxf'])
+    full_plate = full.create_switch_layer('switch')
+
+    layout[0]['tiles'] = 2
+    case = KeyboardCase(layout, ['dxf'])
+    bands = case.tile_bands([(case.key_cutout(placement, 'switch'), placement) for placement in case.placements])
+    assert len(bands) == 2
+    assert sorted(key for band, keys in bands for key in keys) == list(range(len(case.placements)))
+
+    # No cutout crosses the edge of its band
+    for (min_x, max_x), keys in bands:
+        for key in keys:
+            bounds = case.cutout_bounds(case.key_cutout(case.placements[key], 'switch'))
+            assert min_x < bounds[0] and bounds[2] < max_x
+
+    plate = case.create_switch_layer('switch')
+    assert case.timings['tiles']['count'] == 1
+    assert case.timings['cut_switch']['count'] == len(case.placements)
+    assert rounded(plate.holes) == rounded(full_plate.holes)
+
+    # A single band is cut without starting a pool
+    case.init_plate('switch')
+    plate = case.cut_tiles('switch', [((-case.width, case.width), list(range(len(case.placements))))])
+    assert rounded(plate.holes) == rounded(full_plate.holes)
+
+    return True
+
+
+def test_tiles_cadquery():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_tiles_cadquery'
+    full = KeyboardCase(layout, ['dxf'])
+    full_plate = full.create_switch_layer('switch').val()
+
+    layout[0]['tiles'] = 2
+    case = KeyboardCase(layout, ['dxf'])
+    plate = case.create_switch_layer('switch').val()
+    assert case.timings['tiles']['count'] == 1
+
+    # The slices are fused back into a single plate without any seams
+    assert len(plate.Solids()) == 1
+    assert len(plate.Faces()) == len(full_plate.Faces())
+    assert len(shape_contours(plate.wrapped)) == len(shape_contours(full_plate.wrapped))
+
+    return True
@@ -0,0 +1,40 @@
+"""Test the stage timings recorded during a build.
+"""
+import json
+from builder import KeyboardCase, load_layout_file
+from timing import Timer
+
+
+def test_timing():
+    layout = load_layout_file('test_numpad.kle')
+    layout[0]['name'] = 'test_timing'
+    layout[0]['backend'] = '2d'
+    case = KeyboardCase(layout, ['dxf'])
+    case.create_switch_layer('switch')
+    case.export('switch', 'test_exports')
+
+    assert case.timings['parse_layout']['count'] == 1
+    assert case.timings['switch_layer']['count'] == 1
+    assert case.timings['cut_switch']['count'] == len(case.placements)
+    assert case.timings['cutout_switch']['count'] == len(case.cutout_templates)
+    assert case.timings['export_dxf']['count'] == 1
+    assert case.timings['switch_layer']['seconds'] >= case.timings['cut_switch']['seconds']
+
+    case.timer.write_trace('test_exports/test_timing.json')
+    trace = json.load(open('test_exports/test_timing.json'))
+    assert len(trace['traceEvents']) == len(case.timer.events)
+    assert set(event['name'] for event in trace['traceEvents']) == set(case.timings)
+
+    return True
+
+
+def test_timing_events():
+    # Only the newest events are kept, the stages still count every call
+    timer = Timer(max_events=2)
+    for name in ('first', 'second', 'third'):
+        with timer.stage(name):
+            pass
+    assert [event[0] for event in timer.events] == ['second', 'third']
+    assert sorted(timer.stages) == ['first', 'second', 'third']
+
+    return True
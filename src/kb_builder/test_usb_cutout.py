@@ -0,0 +1,27 @@
+"""Test that the 2d backend cuts the USB cutout into the outline like cadquery does.
+"""
+from builder import KeyboardCase, load_layout_file
+from dxf_compare import dxf_differences
+
+
+def test_usb_cutout():
+    dxfs = {}
+    for backend in ('cadquery', '2d'):
+        layout = load_layout_file('test_numpad.kle')
+        layout[0]['name'] = 'test_usb_cutout_%s' % backend
+        layout[0]['backend'] = backend
+        layout[0]['corner_type'] = 'round'
+        layout[0]['corner_radius'] = 4
+        layout[0]['padding'] = [10, 10]
+        layout[0]['usb'] = {'inner_width': 10, 'outer_width': 15, 'height': 5, 'offset': 20}
+        layout[0]['layers'] = {'switch': {'usb_cutout': True}, 'bottom': {'usb_cutout': True}}
+        case = KeyboardCase(layout, ['dxf'])
+        for layer in ('switch', 'bottom'):
+            case.create_layer(layer)
+            case.export(layer, 'test_exports')
+            dxfs[backend, layer] = 'test_exports/%s/%s_layer.dxf' % (case.name, layer)
+
+    for layer in ('switch', 'bottom'):
+        assert dxf_differences(dxfs['2d', layer], dxfs['cadquery', layer]) == []
+
+    return True
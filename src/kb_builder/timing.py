@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+# kb_builder builts keyboard plate and case CAD files using JSON input.
+#
+# Copyright (C) 2015  Will Stevens (swill)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Keep track of where the time goes during a build. Every KeyboardCase has a
+# Timer, and the interesting methods record themselves as a named stage.
+import json
+import os
+
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from time import time
+
+MAX_EVENTS = 100000  # A case can live on in a worker for many builds
+
+
+def timed(stage):
+    """Decorator that records every call to a KeyboardCase method as a stage.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.timer.stage(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Timer(object):
+    """Wall time and call counts for the stages of a build.
+
+    `stages` maps each stage name to a dictionary with the number of calls
+    (`count`) and the total time spent (`seconds`). Stages can be nested, so
+    the times of different stages overlap.
+
+    `events` keeps the last max_events calls as (stage, start, seconds, pid)
+    so the build can be written out as a Chrome trace.
+    """
+    def __init__(self, max_events=MAX_EVENTS):
+        self.stages = {}
+        self.events = deque(maxlen=max_events)
+
+    @contextmanager
+    def stage(self, name):
+        """Record the time spent inside a `with` block.
+        """
+        start = time()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def record(self, name, start):
+        """Record a stage that started at `start` and finished just now.
+        """
+        seconds = time() - start
+        stats = self.stages.setdefault(name, {'count': 0, 'seconds': 0.0})
+        stats['count'] += 1
+        stats['seconds'] += seconds
+        self.events.append((name, start, seconds, os.getpid()))
+
+    def merge(self, other):
+        """Add the stages and events of another Timer, usually from a worker process.
+        """
+        for name, other_stats in other.stages.items():
+            stats = self.stages.setdefault(name, {'count': 0, 'seconds': 0.0})
+            stats['count'] += other_stats['count']
+            stats['seconds'] += other_stats['seconds']
+        self.events.extend(other.events)
+
+    def trace(self):
+        """Returns the events in Chrome's trace event format.
+
+        Load the file in chrome://tracing to see it. Each process gets its own row.
+        """
+        events = []
+        for name, start, seconds, pid in self.events:
+            events.append({
+                'name': name,
+                'cat': 'kb_builder',
+                'ph': 'X',
+                'ts': start * 1000000,
+                'dur': seconds * 1000000,
+                'pid': pid,
+                'tid': pid
+            })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, filename):
+        """Write the events to a Chrome trace file.
+        """
+        with open(filename, 'w') as trace_file:
+            json.dump(self.trace(), trace_file)